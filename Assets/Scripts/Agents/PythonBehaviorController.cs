@@ -35,6 +35,7 @@ public class PythonBehaviorController : MonoBehaviour
     public static bool IsPythonReady => pythonInitialized;
     private static bool hasShutdown = false;
     private static PyObject pythonModule;
+    private static bool useColumnarResults;  // Script defines decide_all_columns()
     private static float nextDecisionTime;
     private static string currentScriptName;
     private string currentTargetID = "0";
@@ -67,6 +68,25 @@ public class PythonBehaviorController : MonoBehaviour
         return pyKey;
     }
 
+    // Dict setters using cached keys - note: keys are NOT disposed (they're cached)
+    private static void SetString(PyDict dict, string key, string value)
+    {
+        using (PyString v = new PyString(value ?? ""))
+            dict[GetCachedKey(key)] = v;
+    }
+
+    private static void SetFloat(PyDict dict, string key, float value)
+    {
+        using (PyFloat v = new PyFloat(value))
+            dict[GetCachedKey(key)] = v;
+    }
+
+    private static void SetInt(PyDict dict, string key, int value)
+    {
+        using (PyInt v = new PyInt(value))
+            dict[GetCachedKey(key)] = v;
+    }
+
     /// <summary>
     /// Pre-initialize all commonly used keys.
     /// </summary>
@@ -117,6 +137,27 @@ public class PythonBehaviorController : MonoBehaviour
         public string targetID;
         public Dictionary<string, object> parameters;
     }
+
+    // Python may send movement/action "type" as an int index into these tables
+    // instead of a string (see Student/_codes.py, which must keep the same order)
+    private static readonly string[] MovementTypeNames = { "walk", "run", "stop", "none", "break" };
+    private static readonly string[] ActionTypeNames = {
+        "none", "sneeze", "cough", "quarantine", "eat", "attack", "claw", "bite",
+        "kill", "avoid", "modify_health", "pick_up", "drop_off"
+    };
+
+    /// <summary>
+    /// Reads a movement/action type sent either as a string or as an int code.
+    /// </summary>
+    private static string ReadTypeCode(PyObject value, string[] names)
+    {
+        if (PyInt.IsIntType(value))
+        {
+            int code = value.As<int>();
+            return code >= 0 && code < names.Length ? names[code] : "none";
+        }
+        return value.As<string>().ToLower();
+    }
     #endregion
 
     #region Unity Lifecycle
@@ -345,6 +386,7 @@ public class PythonBehaviorController : MonoBehaviour
                 // Dispose old module if exists
                 pythonModule?.Dispose();
                 pythonModule = importlib.InvokeMethod("reload", Py.Import(scriptName));
+                useColumnarResults = pythonModule.HasAttr("decide_all_columns");
 
                 Debug.Log($"Loaded Python behavior: {scriptName}");
             }
@@ -380,14 +422,17 @@ public class PythonBehaviorController : MonoBehaviour
 
                     // Measure Python execution
                     var pythonWatch = System.Diagnostics.Stopwatch.StartNew();
-                    using (PyObject decideAllFunc = pythonModule.GetAttr("decide_all"))
+                    using (PyObject decideAllFunc = pythonModule.GetAttr(useColumnarResults ? "decide_all_columns" : "decide_all"))
                     using (PyObject batchResults = decideAllFunc.Invoke(batchPerception))
                     {
                         pythonWatch.Stop();
 
                         // Measure distributing decisions
                         var distributeWatch = System.Diagnostics.Stopwatch.StartNew();
-                        DistributeDecisions(batchResults);
+                        if (useColumnarResults)
+                            DistributeColumnarDecisions(batchResults);
+                        else
+                            DistributeDecisions(batchResults);
                         distributeWatch.Stop();
 
                         totalWatch.Stop();
@@ -450,6 +495,9 @@ public class PythonBehaviorController : MonoBehaviour
             }
         }
 
+        // World lists, shared by every perception (not disposed - owned by the perceptions)
+        BuildWorldLists(out PyList itemList, out PyList depositList, out PyList obstacleList);
+
         foreach (var kvp in registeredAgents)
         {
             string agentID = kvp.Key;
@@ -457,6 +505,10 @@ public class PythonBehaviorController : MonoBehaviour
 
             if (controller == null || controller.actionManager == null) continue;
 
+            // Dead agents get no decision (see DistributeDecisions): don't build their perception.
+            // They stay in all_agents above, so others still see where they are.
+            if (controller.baseAgent.CurrentState == BaseAgent.AgentState.Dead) continue;
+
             AgentActionManager.AgentPerceptionData data = controller.actionManager.GetPerceptionData();
 
             // Agent IDs are dynamic, can't cache
@@ -465,6 +517,9 @@ public class PythonBehaviorController : MonoBehaviour
                 // Don't use 'using' on agentPerception - it gets stored in batchDict
                 PyDict agentPerception = BuildSingleAgentPerception(data, agentID);
                 agentPerception[GetCachedKey("all_agents")] = allAgentsDict;
+                agentPerception[GetCachedKey("items")] = itemList;
+                agentPerception[GetCachedKey("deposites")] = depositList;  // Note: matches robot.py spelling
+                agentPerception[GetCachedKey("obstacles")] = obstacleList;
                 batchDict[agentKey] = agentPerception;
             }
         }
@@ -484,25 +539,6 @@ public class PythonBehaviorController : MonoBehaviour
 
         PyDict perception = new PyDict();
 
-        // Helper using cached keys - note: keys are NOT disposed (they're cached)
-        void SetString(PyDict dict, string key, string value)
-        {
-            using (PyString v = new PyString(value ?? ""))
-                dict[GetCachedKey(key)] = v;
-        }
-
-        void SetFloat(PyDict dict, string key, float value)
-        {
-            using (PyFloat v = new PyFloat(value))
-                dict[GetCachedKey(key)] = v;
-        }
-
-        void SetInt(PyDict dict, string key, int value)
-        {
-            using (PyInt v = new PyInt(value))
-                dict[GetCachedKey(key)] = v;
-        }
-
         // ----- IDENTITY -----
         SetString(perception, "my_id", data.myInstanceID);
         SetFloat(perception, "my_x", data.myPosition.x);
@@ -618,61 +654,61 @@ public class PythonBehaviorController : MonoBehaviour
         // Current target (for reservation system)
         SetString(perception, "current_target_id", data.targetId);
 
+        // Items, deposits and obstacles are the same for every agent:
+        // BuildBatchPerceptionDict adds them once for all (see BuildWorldLists)
+
+        return perception;
+    }
+
+    /// <summary>
+    /// Builds the robot world lists (free items, deposits, obstacles) once per batch.
+    /// Every perception shares the same three lists, like all_agents.
+    /// </summary>
+    private void BuildWorldLists(out PyList itemList, out PyList depositList, out PyList obstacleList)
+    {
         // ----- ITEMS (for robots) -----
-        using (PyList itemList = new PyList())
+        itemList = new PyList();
+        Item[] allItems = Item.GetAllItems();  // Uses your Item registry
+        foreach (Item item in allItems)
         {
-            Item[] allItems = Item.GetAllItems();  // Uses your Item registry
-            foreach (Item item in allItems)
-            {
-                if (item.IsBeingCarried) continue;  // Skip items already picked up
+            if (item.IsBeingCarried) continue;  // Skip items already picked up
 
-                using (PyString itemKey = new PyString(item.InstanceID))
-                using (PyDict itemData = new PyDict())
-                {
-                    SetFloat(itemData, "x", item.Position.x);
-                    SetFloat(itemData, "z", item.Position.z);
-                    SetString(itemData, "id", item.InstanceID);
-                    itemList.Append(itemData);  
-                }
+            using (PyDict itemData = new PyDict())
+            {
+                SetFloat(itemData, "x", item.Position.x);
+                SetFloat(itemData, "z", item.Position.z);
+                SetString(itemData, "id", item.InstanceID);
+                itemList.Append(itemData);
             }
-            perception[GetCachedKey("items")] = itemList;
         }
-          
+
         // ----- DEPOSITS (for robots) -----
-        using (PyList depositList = new PyList())
+        depositList = new PyList();
+        DepositZone[] allDeposits = DepositZone.GetAllDeposits();
+        foreach (DepositZone deposit in allDeposits)
         {
-            DepositZone[] allDeposits = DepositZone.GetAllDeposits();
-            foreach (DepositZone deposit in allDeposits)
+            using (PyDict depositData = new PyDict())
             {
-                using (PyDict depositData = new PyDict())
-                {
-                    SetFloat(depositData, "x", deposit.Position.x);
-                    SetFloat(depositData, "z", deposit.Position.z);
-                    SetString(depositData, "id", deposit.InstanceID);
-                    depositList.Append(depositData);
-                }
+                SetFloat(depositData, "x", deposit.Position.x);
+                SetFloat(depositData, "z", deposit.Position.z);
+                SetString(depositData, "id", deposit.InstanceID);
+                depositList.Append(depositData);
             }
-            perception[GetCachedKey("deposites")] = depositList;  // Note: matches robot.py spelling
         }
 
         // ----- OBSTACLES (for robots) -----
-        using (PyList obstacleList = new PyList())
+        obstacleList = new PyList();
+        Obstacle[] allObstacles = Obstacle.GetAllObstacles();
+        foreach (Obstacle obs in allObstacles)
         {
-            Obstacle[] allObstacles = Obstacle.GetAllObstacles();
-            foreach (Obstacle obs in allObstacles)
+            using (PyDict obsData = new PyDict())
             {
-                using (PyDict obsData = new PyDict())
-                {
-                    SetFloat(obsData, "x", obs.Position.x);
-                    SetFloat(obsData, "z", obs.Position.z);
-                    SetFloat(obsData, "radius", obs.AvoidanceRadius);
-                    obstacleList.Append(obsData);
-                }
+                SetFloat(obsData, "x", obs.Position.x);
+                SetFloat(obsData, "z", obs.Position.z);
+                SetFloat(obsData, "radius", obs.AvoidanceRadius);
+                obstacleList.Append(obsData);
             }
-            perception[GetCachedKey("obstacles")] = obstacleList;
         }
-
-        return perception;
     }
 
     /// <summary>
@@ -710,6 +746,57 @@ public class PythonBehaviorController : MonoBehaviour
         }
     }
 
+    /// <summary>
+    /// Parses columnar batch results from Python and executes decisions for each agent.
+    /// Structure: { "ids": [...], "movement_type": [...], "target_x": [...], "target_z": [...],
+    ///              "action_type": [...], "target_id": [...] (optional) }, one entry per agent.
+    /// </summary>
+    private void DistributeColumnarDecisions(PyObject batchResults)
+    {
+        using (PyDict columns = new PyDict(batchResults))
+        using (PyList ids = new PyList(columns["ids"]))
+        using (PyList movementTypes = new PyList(columns["movement_type"]))
+        using (PyList targetXs = new PyList(columns["target_x"]))
+        using (PyList targetZs = new PyList(columns["target_z"]))
+        using (PyList actionTypes = new PyList(columns["action_type"]))
+        using (PyList targetIDs = columns.HasKey("target_id") ? new PyList(columns["target_id"]) : null)
+        {
+            long count = ids.Length();
+            for (int i = 0; i < count; i++)
+            {
+                string agentID = ids[i].As<string>();
+                if (!registeredAgents.TryGetValue(agentID, out PythonBehaviorController controller)) continue;
+
+                if (controller == null || controller.actionManager == null) continue;
+
+                // Skip dead agents - they don't need decisions
+                if (controller.baseAgent.CurrentState == BaseAgent.AgentState.Dead) continue;
+
+                AgentDecisionData decision = new AgentDecisionData
+                {
+                    movement = new MovementDecision
+                    {
+                        movementType = ReadTypeCode(movementTypes[i], MovementTypeNames),
+                        targetX = targetXs[i].As<float>(),
+                        targetZ = targetZs[i].As<float>()
+                    },
+                    action = new ActionDecision
+                    {
+                        actionType = ReadTypeCode(actionTypes[i], ActionTypeNames),
+                        targetID = targetIDs != null ? targetIDs[i].As<string>() : "",
+                        parameters = new Dictionary<string, object>()
+                    }
+                };
+                Debug.Log($"[Agent {agentID}] Action: {decision.action.actionType} | Move: {decision.movement.movementType} | Target: {decision.action.targetID}");
+
+                AgentActionManager actionManager = controller.actionManager;
+                controller.currentTargetID = decision.action.targetID ?? "0";
+                if(controller.baseAgent.Type == BaseAgent.CharacterType.Robot) { actionManager.SetTargetId(controller.currentTargetID); }
+                ExecuteDecision(actionManager, decision);
+            }
+        }
+    }
+
     /// <summary>
     /// Parses a single agent's decision from Python dict.
     /// </summary>
@@ -743,7 +830,7 @@ public class PythonBehaviorController : MonoBehaviour
                 using (PyDict movementDict = new PyDict(responseDict["movement"]))
                 {
                     if (movementDict.HasKey("type"))
-                        decision.movement.movementType = movementDict["type"].As<string>().ToLower();
+                        decision.movement.movementType = ReadTypeCode(movementDict["type"], MovementTypeNames);
                     if (movementDict.HasKey("target_x"))
                         decision.movement.targetX = movementDict["target_x"].As<float>();
                     if (movementDict.HasKey("target_z"))
@@ -757,7 +844,7 @@ public class PythonBehaviorController : MonoBehaviour
                 using (PyDict actionDict = new PyDict(responseDict["action"]))
                 {
                     if (actionDict.HasKey("type"))
-                        decision.action.actionType = actionDict["type"].As<string>().ToLower();
+                        decision.action.actionType = ReadTypeCode(actionDict["type"], ActionTypeNames);
                     if (actionDict.HasKey("target_id"))
                         decision.action.targetID = actionDict["target_id"].As<string>();
                     if (actionDict.HasKey("parameters"))
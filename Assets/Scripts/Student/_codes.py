@@ -0,0 +1,71 @@
+"""
+Response codes and formats - shared with PythonBehaviorController.cs
+Movement and action "type" can be sent to C# as these ints instead of strings.
+
+The order of MOVEMENT_TYPES / ACTION_TYPES must match MovementTypeNames /
+ActionTypeNames on the C# side. Strings are still accepted there.
+"""
+
+MOVEMENT_TYPES = ("walk", "run", "stop", "none", "break")
+ACTION_TYPES = (
+    "none", "sneeze", "cough", "quarantine", "eat", "attack", "claw", "bite",
+    "kill", "avoid", "modify_health", "pick_up", "drop_off",
+)
+
+MOVE_WALK, MOVE_RUN, MOVE_STOP, MOVE_NONE, MOVE_BREAK = range(len(MOVEMENT_TYPES))
+
+(ACT_NONE, ACT_SNEEZE, ACT_COUGH, ACT_QUARANTINE, ACT_EAT, ACT_ATTACK, ACT_CLAW,
+ ACT_BITE, ACT_KILL, ACT_AVOID, ACT_MODIFY_HEALTH, ACT_PICK_UP, ACT_DROP_OFF) = range(len(ACTION_TYPES))
+
+
+# =========================
+# ===== DECISION COLUMNS ==
+# =========================
+# decide_all_columns() returns one list per field (Unity calls it when it exists):
+# {"ids", "movement_type", "target_x", "target_z", "action_type", "target_id" (optional)}
+
+def stop_columns(agent_ids, target_id=""):
+    """
+    Error fallback of every behaviour: all agents stop, with no action.
+    target_id is what the behaviour uses for "no target" (robots: "0").
+
+    The target is left at (0, 0): on "stop" PythonBehaviorController calls
+    actionManager.Stop() and ignores target_x / target_z, so agents stop
+    where they are (the same as the old per-agent fallbacks that aimed at
+    my_x / my_z).
+    """
+    n = len(agent_ids)
+    return {
+        "ids": list(agent_ids),
+        "movement_type": [MOVE_STOP] * n,
+        "target_x": [0.0] * n,
+        "target_z": [0.0] * n,
+        "action_type": [ACT_NONE] * n,
+        "target_id": [target_id] * n
+    }
+
+
+def columns_to_responses(columns):
+    """
+    Same decisions in the decide_all format, one response dict per agent:
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    target_ids = columns.get("target_id") or [""] * len(columns["ids"])
+    return {
+        agent_id: {
+            "movement": {
+                "type": movement_type,
+                "target_x": target_x,
+                "target_z": target_z
+            },
+            "action": {
+                "type": action_type,
+                "target_id": target_id,
+                "parameters": {}
+            }
+        }
+        for agent_id, movement_type, target_x, target_z, action_type, target_id in zip(
+            columns["ids"], columns["movement_type"], columns["target_x"],
+            columns["target_z"], columns["action_type"], target_ids
+        )
+    }
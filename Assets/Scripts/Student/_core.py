@@ -0,0 +1,356 @@
+"""
+Core numeric kernels - shared by the behavior scripts
+Compiled with Numba when it is installed, plain NumPy otherwise.
+
+Both versions take and return the same arrays, so behaviors can call
+these functions without caring which one is active.
+"""
+
+import math
+
+import numpy as np
+
+# Try to import numba (optional - falls back to NumPy)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def score_pois(cx, cz, poi_xz, poi_attr, exclude_idx):
+        """
+        Weight of every POI for every agent: attraction / (1 + 0.1 * distance).
+        The POI at exclude_idx[i] (if >= 0) gets weight 0 for agent i.
+
+        Returns (n_agents, n_pois) float64 array.
+        """
+        n = cx.shape[0]
+        n_pois = poi_xz.shape[0]
+        weights = np.empty((n, n_pois))
+        for i in range(n):
+            for j in range(n_pois):
+                dx = poi_xz[j, 0] - cx[i]
+                dz = poi_xz[j, 1] - cz[i]
+                weights[i, j] = poi_attr[j] / (1.0 + math.hypot(dx, dz) * 0.1)
+            if exclude_idx[i] >= 0:
+                weights[i, exclude_idx[i]] = 0.0
+        return weights
+
+    @njit(cache=True, fastmath=True)
+    def pick_weighted(weights, rnd):
+        """
+        Weighted choice per row: first column whose cumulative weight
+        reaches rnd[i] * row_total. Rows with no weight pick uniformly.
+
+        Returns (n_rows,) int64 array of column indices.
+        """
+        n, k = weights.shape
+        chosen = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            total = 0.0
+            for j in range(k):
+                total += weights[i, j]
+            if total <= 0.0:
+                chosen[i] = min(int(rnd[i] * k), k - 1)
+                continue
+            threshold = rnd[i] * total
+            cumulative = 0.0
+            chosen[i] = k - 1
+            for j in range(k):
+                cumulative += weights[i, j]
+                if threshold <= cumulative:
+                    chosen[i] = j
+                    break
+        return chosen
+
+    @njit(cache=True, fastmath=True)
+    def flee_dir(my_x, my_z, cx, cz, fallback_angle):
+        """
+        Unit vector pointing from (cx, cz) to (my_x, my_z) for every agent.
+        Agents sitting exactly on the point use fallback_angle instead.
+
+        Returns (fx, fz) float64 arrays.
+        """
+        n = my_x.shape[0]
+        fx = np.empty(n)
+        fz = np.empty(n)
+        for i in range(n):
+            dx = my_x[i] - cx[i]
+            dz = my_z[i] - cz[i]
+            magnitude = math.hypot(dx, dz)
+            if magnitude > 0.0:
+                fx[i] = dx / magnitude
+                fz[i] = dz / magnitude
+            else:
+                fx[i] = math.cos(fallback_angle[i])
+                fz[i] = math.sin(fallback_angle[i])
+        return fx, fz
+
+    @njit(cache=True, fastmath=True)
+    def scan_merges(leader_xz, group_sizes, id_ranks, radius):
+        """
+        Merge plan for flock leaders within radius of each other.
+        Leader i merges into the first (lowest index) strictly larger group
+        in range, else into the equal-sized group with the lowest id rank,
+        if that rank is below its own.
+
+        Leaders are bucketed in square cells of side radius (sorted by cell
+        key), so only the 3x3 cells around each leader are scanned, minus
+        the corner cells whose nearest point is already out of range.
+
+        Returns (n_leaders,) int64 array of leader indices, -1 = no merge.
+        """
+        n = leader_xz.shape[0]
+        targets = np.full(n, -1, dtype=np.int64)
+        if n == 0:
+            return targets
+
+        radius_sq = radius * radius
+        ix = np.empty(n, dtype=np.int64)
+        iz = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            ix[i] = int(math.floor(leader_xz[i, 0] / radius))
+            iz[i] = int(math.floor(leader_xz[i, 1] / radius))
+
+        # Shift by one cell so neighbour keys stay positive and distinct
+        min_x = ix.min() - 1
+        min_z = iz.min() - 1
+        span_z = iz.max() - min_z + 2
+        keys = (ix - min_x) * span_z + (iz - min_z)
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+
+        for i in range(n):
+            larger = -1
+            equal = -1
+            best_rank = id_ranks[i]
+
+            # Gap from the leader to the left/right and lower/upper cell borders
+            gap_left = leader_xz[i, 0] - ix[i] * radius
+            gap_right = radius - gap_left
+            gap_low = leader_xz[i, 1] - iz[i] * radius
+            gap_high = radius - gap_low
+
+            for dx in range(-1, 2):
+                gx = gap_left if dx < 0 else (gap_right if dx > 0 else 0.0)
+                for dz in range(-1, 2):
+                    gz = gap_low if dz < 0 else (gap_high if dz > 0 else 0.0)
+                    # Nearest point of that cell already out of range: skip it
+                    if gx * gx + gz * gz > radius_sq:
+                        continue
+                    key = (ix[i] - min_x + dx) * span_z + (iz[i] - min_z + dz)
+                    start = np.searchsorted(sorted_keys, key)
+                    for s in range(start, n):
+                        if sorted_keys[s] != key:
+                            break
+                        j = order[s]
+                        if j == i:
+                            continue
+                        ddx = leader_xz[j, 0] - leader_xz[i, 0]
+                        ddz = leader_xz[j, 1] - leader_xz[i, 1]
+                        if ddx * ddx + ddz * ddz > radius_sq:
+                            continue
+                        if group_sizes[j] > group_sizes[i]:
+                            if larger < 0 or j < larger:
+                                larger = j
+                        elif group_sizes[j] == group_sizes[i] and id_ranks[j] < best_rank:
+                            best_rank = id_ranks[j]
+                            equal = j
+            targets[i] = larger if larger >= 0 else equal
+        return targets
+
+    @njit(cache=True)
+    def closest_hits(owner, hit_x, hit_z, my_x, my_z, radius_sq):
+        """
+        Closest hit of every agent. Hit h belongs to agent owner[h] and only
+        counts if its squared distance is below radius_sq[owner[h]]; ties keep
+        the lowest hit index. (No fastmath: radius_sq may be inf.)
+
+        Returns (best, best_d2): (n_agents,) int64 hit index (-1 = none) and
+        its squared distance (radius_sq where none).
+        """
+        n = my_x.shape[0]
+        best = np.full(n, -1, dtype=np.int64)
+        best_d2 = radius_sq.astype(np.float64)
+        for h in range(owner.shape[0]):
+            i = owner[h]
+            dx = hit_x[h] - my_x[i]
+            dz = hit_z[h] - my_z[i]
+            d2 = dx * dx + dz * dz
+            if d2 < best_d2[i]:
+                best_d2[i] = d2
+                best[i] = h
+        return best, best_d2
+
+    @njit(cache=True)
+    def pick_free_items(my_x, my_z, my_rank, item_x, item_z, other_x, other_z, other_rank):
+        """
+        Polite item choice for robots: agent i takes the closest item that no
+        other idle robot wins. Robot k wins item j over agent i if it is
+        closer, or within 1% with a lower id rank; robots with the agent's own
+        rank are skipped. Ties keep the lowest item index. (No fastmath: the
+        distance comparisons must match the NumPy version exactly.)
+
+        Returns (n_agents,) int64 array of item indices, -1 = none.
+        """
+        n = my_x.shape[0]
+        chosen = np.full(n, -1, dtype=np.int64)
+        for i in range(n):
+            best_d2 = np.inf
+            for j in range(item_x.shape[0]):
+                d2 = (item_x[j] - my_x[i]) ** 2 + (item_z[j] - my_z[i]) ** 2
+                if d2 >= best_d2:
+                    continue
+                taken = False
+                for k in range(other_x.shape[0]):
+                    if other_rank[k] == my_rank[i]:
+                        continue
+                    dx = item_x[j] - other_x[k]
+                    dz = item_z[j] - other_z[k]
+                    other_d2 = dx * dx + dz * dz
+                    if other_d2 < d2 or (
+                        abs(other_d2 - d2) <= 0.01 * max(abs(other_d2), abs(d2))
+                        and other_rank[k] < my_rank[i]
+                    ):
+                        taken = True
+                        break
+                if not taken:
+                    best_d2 = d2
+                    chosen[i] = j
+        return chosen
+
+else:
+
+    def score_pois(cx, cz, poi_xz, poi_attr, exclude_idx):
+        """
+        Weight of every POI for every agent: attraction / (1 + 0.1 * distance).
+        The POI at exclude_idx[i] (if >= 0) gets weight 0 for agent i.
+
+        Returns (n_agents, n_pois) float64 array.
+        """
+        dist = np.hypot(poi_xz[None, :, 0] - cx[:, None], poi_xz[None, :, 1] - cz[:, None])
+        weights = poi_attr[None, :] / (1.0 + dist * 0.1)
+        excluded = exclude_idx >= 0
+        weights[np.flatnonzero(excluded), exclude_idx[excluded]] = 0.0
+        return weights
+
+    def pick_weighted(weights, rnd):
+        """
+        Weighted choice per row: first column whose cumulative weight
+        reaches rnd[i] * row_total. Rows with no weight pick uniformly.
+
+        Returns (n_rows,) int64 array of column indices.
+        """
+        k = weights.shape[1]
+        cumulative = np.cumsum(weights, axis=1)
+        total = cumulative[:, -1]
+        chosen = np.minimum((cumulative < (rnd * total)[:, None]).sum(axis=1), k - 1)
+        no_weight = total <= 0.0
+        chosen[no_weight] = np.minimum((rnd[no_weight] * k).astype(np.int64), k - 1)
+        return chosen
+
+    def flee_dir(my_x, my_z, cx, cz, fallback_angle):
+        """
+        Unit vector pointing from (cx, cz) to (my_x, my_z) for every agent.
+        Agents sitting exactly on the point use fallback_angle instead.
+
+        Returns (fx, fz) float64 arrays.
+        """
+        dx = np.asarray(my_x - cx, dtype=np.float64)
+        dz = np.asarray(my_z - cz, dtype=np.float64)
+        magnitude = np.hypot(dx, dz)
+        moving = magnitude > 0.0
+        fx = np.divide(dx, magnitude, out=np.cos(fallback_angle), where=moving)
+        fz = np.divide(dz, magnitude, out=np.sin(fallback_angle), where=moving)
+        return fx, fz
+
+    def scan_merges(leader_xz, group_sizes, id_ranks, radius):
+        """
+        Merge plan for flock leaders within radius of each other.
+        Leader i merges into the first (lowest index) strictly larger group
+        in range, else into the equal-sized group with the lowest id rank,
+        if that rank is below its own.
+
+        Returns (n_leaders,) int64 array of leader indices, -1 = no merge.
+        """
+        n = leader_xz.shape[0]
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        diff = leader_xz[:, None, :] - leader_xz[None, :, :]
+        near = np.einsum('ijk,ijk->ij', diff, diff) <= radius * radius
+        np.fill_diagonal(near, False)
+
+        larger = near & (group_sizes[None, :] > group_sizes[:, None])
+        equal = near & (group_sizes[None, :] == group_sizes[:, None]) & (id_ranks[None, :] < id_ranks[:, None])
+        lowest_equal = np.where(equal, id_ranks[None, :], n).argmin(axis=1)
+
+        targets = np.where(equal.any(axis=1), lowest_equal, -1)
+        return np.where(larger.any(axis=1), larger.argmax(axis=1), targets).astype(np.int64)
+
+    def closest_hits(owner, hit_x, hit_z, my_x, my_z, radius_sq):
+        """
+        Closest hit of every agent. Hit h belongs to agent owner[h] and only
+        counts if its squared distance is below radius_sq[owner[h]]; ties keep
+        the lowest hit index.
+
+        Returns (best, best_d2): (n_agents,) int64 hit index (-1 = none) and
+        its squared distance (radius_sq where none).
+        """
+        dx = hit_x - my_x[owner]
+        dz = hit_z - my_z[owner]
+        d2 = dx * dx + dz * dz
+        in_range = np.flatnonzero(d2 < radius_sq[owner])
+
+        best = np.full(len(my_x), -1, dtype=np.int64)
+        best_d2 = radius_sq.astype(np.float64)
+        if len(in_range) == 0:
+            return best, best_d2
+
+        # Sort by agent, then distance: the first hit of each agent's run is its closest
+        order = in_range[np.lexsort((d2[in_range], owner[in_range]))]
+        sorted_owner = owner[order]
+        first = order[np.concatenate(([True], sorted_owner[1:] != sorted_owner[:-1]))]
+        best[owner[first]] = first
+        best_d2[owner[first]] = d2[first]
+        return best, best_d2
+
+    def pick_free_items(my_x, my_z, my_rank, item_x, item_z, other_x, other_z, other_rank):
+        """
+        Polite item choice for robots: agent i takes the closest item that no
+        other idle robot wins. Robot k wins item j over agent i if it is
+        closer, or within 1% with a lower id rank; robots with the agent's own
+        rank are skipped. Ties keep the lowest item index.
+
+        Only the closest competitor matters per item: competitors are sorted
+        by rank and running minimums give, for each agent, the closest one
+        ranked below it (the only ones that win ties) and above it.
+
+        Returns (n_agents,) int64 array of item indices, -1 = none.
+        """
+        n = len(my_x)
+        if len(item_x) == 0:
+            return np.full(n, -1, dtype=np.int64)
+        d2 = (item_x[None, :] - my_x[:, None]) ** 2 + (item_z[None, :] - my_z[:, None]) ** 2
+
+        order = np.argsort(other_rank, kind='stable')
+        sorted_rank = other_rank[order]
+        dx = item_x[None, :] - other_x[order, None]
+        dz = item_z[None, :] - other_z[order, None]
+        other_d2 = dx * dx + dz * dz
+
+        # below[c] / above[c]: closest of the c lowest-ranked competitors / of the others
+        none = np.full((1, len(item_x)), np.inf)
+        below = np.concatenate((none, np.minimum.accumulate(other_d2, axis=0)))
+        above = np.concatenate((np.minimum.accumulate(other_d2[::-1], axis=0)[::-1], none))
+        closest_lower = below[np.searchsorted(sorted_rank, my_rank, 'left')]
+        closest_other = np.minimum(closest_lower, above[np.searchsorted(sorted_rank, my_rank, 'right')])
+
+        same = np.isfinite(closest_lower) & (np.abs(closest_lower - d2) <= 0.01 * np.maximum(closest_lower, d2))
+        candidates = np.where((closest_other < d2) | same, np.inf, d2)
+        best = candidates.argmin(axis=1)
+        found = np.isfinite(candidates[np.arange(n), best])
+        return np.where(found, best, -1).astype(np.int64)
@@ -2,10 +2,16 @@
 Simple Flocking Behavior - Batch Processing Version
 All agents walk at normal speed, forming groups based on proximity
 
-Entry point: decide_all() is called by Unity once per decision cycle
+Entry point: decide_all_columns() is called by Unity once per decision cycle
+(decide_all() returns the same decisions as one response dict per agent)
 """
 
-import random
+from operator import itemgetter
+
+import numpy as np
+
+from _codes import MOVE_WALK, ACT_NONE, stop_columns, columns_to_responses
+from _core import scan_merges
 
 
 # =========================
@@ -15,6 +21,18 @@ import random
 MEETING_DISTANCE = 4.0
 DECISION_INTERVAL = 0.5  # Must match C# decisionInterval!
 FOLLOW_DISTANCE = 2.0
+WANDER_ARRIVAL_DISTANCE = 1.0
+REQUIRED_KEYS = ('my_id', 'my_x', 'my_z', 'all_agents')  # Checked once per batch
+
+# C-level field readers for the per-agent loops
+read_perception = itemgetter(*REQUIRED_KEYS)
+read_position = itemgetter('x', 'z')
+WANDER_RANGE = 12.0             # Half-width of the square new destinations are drawn from
+DESTINATION_POOL_SIZE = 4096
+
+# Squared thresholds: compare against dx*dx + dz*dz, no sqrt needed
+MEETING_DISTANCE_SQ = MEETING_DISTANCE * MEETING_DISTANCE
+WANDER_ARRIVAL_DISTANCE_SQ = WANDER_ARRIVAL_DISTANCE * WANDER_ARRIVAL_DISTANCE
 
 
 # =========================
@@ -22,8 +40,26 @@ FOLLOW_DISTANCE = 2.0
 # =========================
 # Persists between decision cycles
 
+class LeaderState:
+    """Wander state and group size of one leader (slotted: no per-instance dict)."""
+    __slots__ = ('target_x', 'target_z', 'time_left', 'group_size')
+    
+    def __init__(self, target_x, target_z, time_left, group_size):
+        self.target_x = target_x
+        self.target_z = target_z
+        self.time_left = time_left
+        self.group_size = group_size
+
+
 group_memberships = {}  # {follower_id: leader_id}
-leader_data = {}        # {leader_id: {'target_x', 'target_z', 'time_left', 'group_size'}}
+followers_of = {}       # {leader_id: set(follower_ids)} - inverse of group_memberships
+leader_data = {}        # {leader_id: LeaderState}
+
+# Random wander offsets, drawn in bulk and consumed in order;
+# the whole buffer is redrawn each time it has been used up
+_rng = np.random.default_rng()
+_destination_offsets = _rng.uniform(-WANDER_RANGE, WANDER_RANGE, (DESTINATION_POOL_SIZE, 2)).tolist()
+_next_offset = 0
 
 
 # =========================
@@ -31,6 +67,14 @@ leader_data = {}        # {leader_id: {'target_x', 'target_z', 'time_left', 'gro
 # =========================
 
 def decide_all(all_perceptions):
+    """
+    Same decisions as decide_all_columns, one response dict per agent:
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
     """
     Called by Unity once per decision cycle with ALL agents' perception data.
     
@@ -38,162 +82,178 @@ def decide_all(all_perceptions):
         all_perceptions: dict of {agent_id: perception_data}
     
     Returns:
-        dict of {agent_id: decision}
+        The decisions as one list per field:
+        {"ids", "movement_type", "target_x", "target_z", "action_type", "target_id"}
     """
-    all_decisions = {}
-    
-    for agent_id, perception in all_perceptions.items():
-        try:
-            decision = decide_action(perception)
-            all_decisions[agent_id] = decision
-        except Exception as e:
-            # On error, stop the agent
-            all_decisions[agent_id] = build_response(0, 0, "stop")
-    
-    return all_decisions
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        # On error, every agent stops
+        print(f"Error in flock batch: {e}")
+        return stop_columns(all_perceptions)
 
 
-# =========================
-# ===== AGENT LOGIC =======
-# =========================
-
-def decide_action(perception):
+def decide_batch(all_perceptions):
     """
-    Decision logic for a single agent.
+    Decide for every agent of the cycle.
     
-    Args:
-        perception: dict with this agent's sensory data including 'all_agents'
-        
-    Returns:
-        dict with 'movement' and 'action' keys
-    """
-    my_id = perception['my_id']
-    my_x = perception['my_x']
-    my_z = perception['my_z']
-    all_agents = perception['all_agents']  # Shared dict built by C#
+    Followers are decided first. Leaders are then checked for merges all
+    together (scan_merges), and either join the chosen group or wander.
     
-    target_x, target_z, movement_type = determine_movement(my_id, my_x, my_z, all_agents)
+    Returns the decisions as columns (see decide_all_columns), followers
+    first, then leaders.
+    """
+    ids = []
+    movement_type = []
+    target_x = []
+    target_z = []
+    leaders = []  # [(agent_id, my_x, my_z)] still to decide this cycle
+    all_agents = {}
+    
+    # Perceptions all come from the same C# builder: check the format once
+    for perception in all_perceptions.values():
+        missing = [key for key in REQUIRED_KEYS if key not in perception]
+        if missing:
+            raise KeyError(f"perception is missing {missing}")
+        break
+    
+    # Bind the per-agent helpers to locals once for the loops below
+    read = read_perception
+    determine = determine_movement
+    add_id = ids.append
+    add_type = movement_type.append
+    add_x = target_x.append
+    add_z = target_z.append
+    add_leader = leaders.append
     
-    return build_response(target_x, target_z, movement_type)
+    for agent_id, perception in all_perceptions.items():
+        # all_agents is the same dict for everyone, built by C#
+        my_id, my_x, my_z, all_agents = read(perception)
+        
+        movement = determine(my_id, my_x, my_z, all_agents)
+        if movement is None:
+            add_leader((agent_id, my_x, my_z))
+        else:
+            add_id(agent_id)
+            add_x(movement[0])
+            add_z(movement[1])
+            add_type(movement[2])
+    
+    merge_targets = find_merge_targets(leaders, all_agents)
+    
+    move_leader = leader_movement
+    for (agent_id, my_x, my_z), merge_target in zip(leaders, merge_targets):
+        movement = move_leader(agent_id, my_x, my_z, merge_target, all_agents)
+        add_id(agent_id)
+        add_x(movement[0])
+        add_z(movement[1])
+        add_type(movement[2])
+    
+    # Flocking never acts
+    n = len(ids)
+    return {
+        "ids": ids,
+        "movement_type": movement_type,
+        "target_x": target_x,
+        "target_z": target_z,
+        "action_type": [ACT_NONE] * n,
+        "target_id": [""] * n
+    }
 
 
+# =========================
+# ===== AGENT LOGIC =======
+# =========================
+
 def determine_movement(my_id, my_x, my_z, all_agents):
     """
-    Core flocking logic - determines where the agent should move.
+    Core flocking logic for one agent, before the merge scan.
     
     Returns:
-        (target_x, target_z, movement_type)
+        (target_x, target_z, movement_type) for followers,
+        None for leaders (decided by leader_movement after the merge scan)
     """
     
     # === FOLLOWERS: Follow their leader ===
-    if my_id in group_memberships:
-        leader_id = group_memberships[my_id]
-        
-        if leader_id in all_agents:
-            leader_pos = all_agents[leader_id]
-            return (leader_pos['x'], leader_pos['z'], "walk")
+    leader_id = group_memberships.get(my_id)
+    if leader_id is not None:
+        leader_pos = all_agents.get(leader_id)
+        if leader_pos is not None:
+            leader_x, leader_z = read_position(leader_pos)
+            return (leader_x, leader_z, MOVE_WALK)
         else:
             # Leader gone - become independent
             del group_memberships[my_id]
+            leave_group(my_id, leader_id)
             become_leader(my_id, my_x, my_z)
             data = leader_data[my_id]
-            return (data['target_x'], data['target_z'], "walk")
+            return (data.target_x, data.target_z, MOVE_WALK)
     
-    # === LEADERS: Check for merges, then wander ===
-    
-    # Initialize as leader if needed
+    # === LEADERS: Initialize if needed, merge check comes later ===
     if my_id not in leader_data:
         become_leader(my_id, my_x, my_z)
     
-    # Update group size
-    update_group_size(my_id)
-    my_group_size = leader_data[my_id]['group_size']
-    
-    # Find nearby leaders for potential merging
-    nearby_leaders = find_nearby_leaders(my_id, my_x, my_z, all_agents)
-    
-    # Try to merge with a larger group
-    if nearby_leaders:
-        merge_target = find_merge_target(my_id, my_group_size, nearby_leaders)
-        
-        if merge_target is not None:
-            merge_into_group(my_id, merge_target)
-            
-            if merge_target in all_agents:
-                pos = all_agents[merge_target]
-                return (pos['x'], pos['z'], "walk")
-    
-    # No merge - continue wandering as leader
-    return leader_wander(my_id, my_x, my_z)
+    return None
 
 
-def find_nearby_leaders(my_id, my_x, my_z, all_agents):
+def find_merge_targets(leaders, all_agents):
     """
-    Find other leaders within MEETING_DISTANCE.
+    Decide which leader each leader should merge into, if any.
+    
+    Rules (applied on this cycle's group sizes):
+    1. Merge into strictly larger groups within MEETING_DISTANCE
+    2. For equal-sized groups, lower ID wins (deterministic tie-breaker)
+    
+    Args:
+        leaders: list of (leader_id, x, z), in all_agents order
     
     Returns:
-        list of (leader_id, position, distance, group_size)
+        list of leader_id to merge with (or None), parallel to leaders
     """
-    nearby = []
+    if not leaders:
+        return []
     
-    for agent_id, pos in all_agents.items():
-        # Skip self
-        if agent_id == my_id:
-            continue
-        
-        # Skip my followers
-        if agent_id in group_memberships and group_memberships[agent_id] == my_id:
-            continue
-        
-        # Only consider leaders
-        if agent_id not in leader_data:
-            continue
-        
-        dist = calculate_distance(my_x, my_z, pos['x'], pos['z'])
-        
-        if dist <= MEETING_DISTANCE:
-            size = leader_data[agent_id]['group_size']
-            nearby.append((agent_id, pos, dist, size))
+    leader_ids = [leader_id for leader_id, _, _ in leaders]
+    
+    sizes = np.empty(len(leaders), dtype=np.int64)
+    for i, leader_id in enumerate(leader_ids):
+        update_group_size(leader_id)
+        sizes[i] = leader_data[leader_id].group_size
+    
+    leader_xz = np.array([(x, z) for _, x, z in leaders], dtype=np.float64)
+    
+    # Rank of each id in string order, for the lower-ID tie-breaker
+    ranks = np.empty(len(leaders), dtype=np.int64)
+    ranks[sorted(range(len(leader_ids)), key=leader_ids.__getitem__)] = np.arange(len(leaders))
     
-    return nearby
+    targets = scan_merges(leader_xz, sizes, ranks, MEETING_DISTANCE)
+    return [leader_ids[t] if t >= 0 else None for t in targets.tolist()]
 
 
-def find_merge_target(my_id, my_group_size, nearby_leaders):
+def leader_movement(my_id, my_x, my_z, merge_target, all_agents):
     """
-    Determine which leader to merge with, if any.
-    
-    Rules:
-    1. Merge into strictly larger groups
-    2. For equal-sized groups, lower ID wins (deterministic tie-breaker)
+    Merge into merge_target if there is one, otherwise keep wandering.
     
     Returns:
-        leader_id to merge with, or None
+        (target_x, target_z, movement_type)
     """
-    # First: look for strictly larger group
-    for leader_id, pos, dist, size in nearby_leaders:
-        if size > my_group_size:
-            return leader_id
-    
-    # Second: handle equal-sized groups
-    equal_sized = [
-        (leader_id, pos)
-        for leader_id, pos, dist, size in nearby_leaders
-        if size == my_group_size
-    ]
-    
-    if equal_sized:
-        # Find lowest ID among equals (including myself)
-        lowest_id = my_id
-        
-        for leader_id, pos in equal_sized:
-            if leader_id < lowest_id:
-                lowest_id = leader_id
+    if merge_target is not None:
+        # The target may itself have merged earlier in this cycle:
+        # join its new leader, but only if that one is in range too
+        while merge_target in group_memberships:
+            merge_target = group_memberships[merge_target]
         
-        # Only merge if someone else has lower ID
-        if lowest_id != my_id:
-            return lowest_id
+        pos = all_agents.get(merge_target)
+        if pos is not None:
+            target_x, target_z = read_position(pos)
+            dx = target_x - my_x
+            dz = target_z - my_z
+            if dx * dx + dz * dz <= MEETING_DISTANCE_SQ:
+                merge_into_group(my_id, merge_target)
+                return (target_x, target_z, MOVE_WALK)
     
-    return None
+    # No merge - continue wandering as leader
+    return leader_wander(my_id, my_x, my_z)
 
 
 # =========================
@@ -203,27 +263,26 @@ def find_merge_target(my_id, my_group_size, nearby_leaders):
 def become_leader(agent_id, current_x, current_z):
     """Initialize agent as a leader with a random wander target."""
     target_x, target_z = generate_random_destination(current_x, current_z)
-    leader_data[agent_id] = {
-        'target_x': target_x,
-        'target_z': target_z,
-        'time_left': 3.0,
-        'group_size': 1
-    }
+    leader_data[agent_id] = LeaderState(target_x, target_z, 3.0, 1)
 
 
 def merge_into_group(my_id, new_leader_id):
     """Transfer myself and all my followers to a new leader."""
+    new_followers = followers_of.setdefault(new_leader_id, set())
+    
     # Transfer my followers to new leader
     if my_id in leader_data:
-        for follower_id in list(group_memberships.keys()):
-            if group_memberships[follower_id] == my_id:
-                group_memberships[follower_id] = new_leader_id
+        my_followers = followers_of.pop(my_id, ())
+        for follower_id in my_followers:
+            group_memberships[follower_id] = new_leader_id
+        new_followers.update(my_followers)
         
         # Remove my leader status
         del leader_data[my_id]
     
     # I become a follower
     group_memberships[my_id] = new_leader_id
+    new_followers.add(my_id)
     
     # Update new leader's count
     update_group_size(new_leader_id)
@@ -234,21 +293,28 @@ def update_group_size(leader_id):
     if leader_id not in leader_data:
         return
     
-    follower_count = sum(
-        1 for lid in group_memberships.values()
-        if lid == leader_id
-    )
-    
-    leader_data[leader_id]['group_size'] = follower_count + 1
+    leader_data[leader_id].group_size = len(followers_of.get(leader_id, ())) + 1
+
+
+def leave_group(follower_id, leader_id):
+    """Drop a follower from its (former) leader's follower set."""
+    followers = followers_of.get(leader_id)
+    if followers is not None:
+        followers.discard(follower_id)
+        if not followers:
+            del followers_of[leader_id]
 
 
 # =========================
 # ===== LEADER MOVEMENT ===
 # =========================
 
-def leader_wander(leader_id, current_x, current_z):
+def leader_wander(leader_id, current_x, current_z,
+                  _decision_interval=DECISION_INTERVAL,
+                  _arrival_sq=WANDER_ARRIVAL_DISTANCE_SQ):
     """
     Leaders wander randomly, picking new destinations periodically.
+    Constants are bound as defaults so the per-leader call reads locals.
     
     Returns:
         (target_x, target_z, movement_type)
@@ -256,61 +322,33 @@ def leader_wander(leader_id, current_x, current_z):
     data = leader_data[leader_id]
     
     # Countdown timer
-    data['time_left'] -= DECISION_INTERVAL
-    
-    # Pick new destination when timer expires
-    if data['time_left'] <= 0:
-        data['target_x'], data['target_z'] = generate_random_destination(current_x, current_z)
-        data['time_left'] = 3.0
-    
-    # Pick new destination when close to current target
-    dist_to_target = calculate_distance(
-        current_x, current_z,
-        data['target_x'], data['target_z']
-    )
+    data.time_left -= _decision_interval
     
-    if dist_to_target < 1.0:
-        data['target_x'], data['target_z'] = generate_random_destination(current_x, current_z)
-        data['time_left'] = 3.0
+    # Pick new destination when timer expires or when close to current target
+    # (the distance test is skipped once the timer has run out)
+    dx = data.target_x - current_x
+    dz = data.target_z - current_z
+    if data.time_left <= 0 or dx * dx + dz * dz < _arrival_sq:
+        data.target_x, data.target_z = generate_random_destination(current_x, current_z)
+        data.time_left = 3.0
     
-    return (data['target_x'], data['target_z'], "walk")
+    return (data.target_x, data.target_z, MOVE_WALK)
 
 
 # =========================
 # ===== UTILITIES =========
 # =========================
 
-def generate_random_destination(current_x, current_z):
+def generate_random_destination(current_x, current_z,
+                                _offsets=_destination_offsets,
+                                _pool_size=DESTINATION_POOL_SIZE):
     """Generate a random point within a square around current position."""
-    offset_x = random.uniform(-12.0, 12.0)
-    offset_z = random.uniform(-12.0, 12.0)
+    global _next_offset
+    
+    offset_x, offset_z = _offsets[_next_offset]
+    _next_offset += 1
+    if _next_offset == _pool_size:
+        _next_offset = 0
+        _offsets[:] = _rng.uniform(-WANDER_RANGE, WANDER_RANGE, (_pool_size, 2)).tolist()
     return (current_x + offset_x, current_z + offset_z)
 
-
-def calculate_distance(x1, z1, x2, z2):
-    """Euclidean distance between two 2D points."""
-    dx = x2 - x1
-    dz = z2 - z1
-    return (dx * dx + dz * dz) ** 0.5
-
-
-def build_response(target_x, target_z, movement_type):
-    """
-    Build response dict in the format C# expects.
-    
-    Args:
-        target_x, target_z: destination coordinates
-        movement_type: "walk", "run", "stop", or "none"
-    """
-    return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_x,
-            "target_z": target_z
-        },
-        "action": {
-            "type": "none",
-            "target_id": "",
-            "parameters": {}
-        }
-    }
\ No newline at end of file
@@ -3,18 +3,30 @@ Flu Behavior - Batch Processing Version
 Agents wander randomly and sneeze/cough when contagious
 """
 
-import random
+import numpy as np
+
+from _codes import MOVE_WALK, ACT_NONE, ACT_SNEEZE, ACT_COUGH, stop_columns, columns_to_responses
 
 # =========================
 # ===== GLOBAL STATE ======
 # =========================
 
-wander_data = {}  # {agent_id: {'target_x', 'target_z', 'time_left'}}
-
 WANDER_INTERVAL = 3.0      # Change direction every 3 seconds
 DECISION_INTERVAL = 0.5    # How often decide_all is called (match C#)
 SNEEZE_CHANCE = 0.3        # 30% chance to sneeze when contagious
 COUGH_CHANCE = 0.2         # 20% chance to cough when contagious
+WANDER_RANGE = 10.0        # New targets are drawn within +/- this on each axis
+ARRIVAL_DISTANCE_SQ = 1.0  # Squared distance at which a target counts as reached
+
+# Wander state as parallel arrays; wander_index gives each agent's row
+wander_index = {}          # {agent_id: row}
+_target_x = np.zeros(256)
+_target_z = np.zeros(256)
+_time_left = np.zeros(256)
+
+ROLL_ACTIONS = (ACT_SNEEZE, ACT_COUGH, ACT_NONE)  # Indexed by how many thresholds the roll passed
+
+_rng = np.random.default_rng()
 
 
 # =========================
@@ -22,134 +34,132 @@ COUGH_CHANCE = 0.2         # 20% chance to cough when contagious
 # =========================
 
 def decide_all(all_perceptions):
+    """
+    Same decisions as decide_all_columns, one response dict per agent:
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
     """
     Called by Unity once per decision cycle with ALL agents' perception data.
+    Returns the decisions as one list per field:
+    {"ids", "movement_type", "target_x", "target_z", "action_type"}.
     
     For flu behavior, agents don't need to know about ALL other agents -
     they just use their local perception (visible/heard agents).
     So we don't need to build a shared all_agents dict here.
     """
-    all_decisions = {}
-    
-    for agent_id, perception in all_perceptions.items():
-        try:
-            decision = decide_action(perception)
-            all_decisions[agent_id] = decision
-        except Exception as e:
-            print(f"Error processing {agent_id}: {e}")
-            all_decisions[agent_id] = build_response(0, 0, "stop", "none")
-    
-    return all_decisions
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        # On error, every agent stops
+        print(f"Error processing flu batch: {e}")
+        return stop_columns(all_perceptions)
 
 
 # =========================
 # ===== AGENT LOGIC =======
 # =========================
 
-def decide_action(perception):
+def decide_batch(all_perceptions):
     """
-    Main decision function for a single agent.
+    Decide for all agents at once, one array element per agent.
     Agents wander randomly. When contagious, they sneeze/cough.
     
     This behavior demonstrates:
     - Using local perception (heard_agents) instead of global knowledge
     - Infection spread mechanics via sneeze/cough actions
+    
+    Returns the decisions as columns (see decide_all_columns).
     """
-    my_id = perception['my_id']
-    my_x = perception['my_x']
-    my_z = perception['my_z']
-    is_contagious = perception['is_contagious'] == 1
-    infection_stage = perception['infection_stage']
+    agent_ids = list(all_perceptions)
+    perceptions = list(all_perceptions.values())
+    n = len(perceptions)
+    if n == 0:
+        return {"ids": [], "movement_type": [], "target_x": [], "target_z": [], "action_type": []}
     
-    # Determine movement (always wander)
-    target_x, target_z = get_wander_target(my_id, my_x, my_z)
+    my_x = np.fromiter((p['my_x'] for p in perceptions), dtype=np.float64, count=n)
+    my_z = np.fromiter((p['my_z'] for p in perceptions), dtype=np.float64, count=n)
+    is_contagious = np.fromiter((p['is_contagious'] == 1 for p in perceptions), dtype=bool, count=n)
+    heard_count = np.fromiter((p['heard_count'] for p in perceptions), dtype=np.int64, count=n)
+    rows = np.fromiter((wander_row(p['my_id']) for p in perceptions), dtype=np.intp, count=n)
     
-    # Determine action (sneeze/cough if contagious and near others)
-    action_type = "none"
+    # Determine movement (always wander)
+    target_x, target_z = update_wander_targets(rows, my_x, my_z)
     
-    if is_contagious:
-        # Check if anyone is nearby using heard_agents
-        # heard_count tells us how many agents are within hearing range
-        heard_count = perception['heard_count']
-        
-        if heard_count > 0:
-            # Roll for sneeze or cough
-            roll = random.random()
-            if roll < SNEEZE_CHANCE:
-                action_type = "sneeze"
-            elif roll < SNEEZE_CHANCE + COUGH_CHANCE:
-                action_type = "cough"
+    # Determine action (sneeze/cough if contagious and someone is within hearing range)
+    roll = _rng.random(n)
+    passed = (roll >= SNEEZE_CHANCE).astype(np.intp) + (roll >= SNEEZE_CHANCE + COUGH_CHANCE)
+    passed[~(is_contagious & (heard_count > 0))] = 2
     
-    return build_response(target_x, target_z, "walk", action_type)
+    return {
+        "ids": agent_ids,
+        "movement_type": [MOVE_WALK] * n,
+        "target_x": target_x.tolist(),
+        "target_z": target_z.tolist(),
+        "action_type": np.take(ROLL_ACTIONS, passed).tolist()
+    }
 
 
 # =========================
 # ===== HELPER FUNCTIONS ==
 # =========================
 
-def get_wander_target(agent_id, current_x, current_z):
+def wander_row(agent_id):
     """
-    Returns a wander target, generating new one if needed.
-    Uses global wander_data to persist targets between calls.
+    Row of this agent in the wander arrays, created on first sight.
+    New rows start with no timer (NaN): update_wander_targets gives them
+    their first target and a full WANDER_INTERVAL, in one draw for all.
     """
-    # Initialize if new agent
-    if agent_id not in wander_data:
-        target_x, target_z = generate_random_target(current_x, current_z)
-        wander_data[agent_id] = {
-            'target_x': target_x,
-            'target_z': target_z,
-            'time_left': WANDER_INTERVAL
-        }
-    
-    data = wander_data[agent_id]
+    global _target_x, _target_z, _time_left
     
-    # Decrease timer
-    data['time_left'] -= DECISION_INTERVAL
+    row = wander_index.get(agent_id)
+    if row is not None:
+        return row
     
-    # Time to pick new target?
-    if data['time_left'] <= 0:
-        data['target_x'], data['target_z'] = generate_random_target(current_x, current_z)
-        data['time_left'] = WANDER_INTERVAL
+    row = wander_index[agent_id] = len(wander_index)
+    if row == len(_target_x):
+        _target_x = np.resize(_target_x, 2 * row)
+        _target_z = np.resize(_target_z, 2 * row)
+        _time_left = np.resize(_time_left, 2 * row)
     
-    # Reached target? Pick new one
-    dist = calculate_distance(current_x, current_z, data['target_x'], data['target_z'])
-    if dist < 1.0:
-        data['target_x'], data['target_z'] = generate_random_target(current_x, current_z)
-        data['time_left'] = WANDER_INTERVAL
-    
-    return data['target_x'], data['target_z']
-
+    _time_left[row] = np.nan
+    return row
 
-def generate_random_target(current_x, current_z):
-    """Generate a random point 5-10 units away."""
-    offset_x = random.uniform(-10.0, 10.0)
-    offset_z = random.uniform(-10.0, 10.0)
-    return current_x + offset_x, current_z + offset_z
 
+def update_wander_targets(rows, current_x, current_z):
+    """
+    Advance the wander timers of the given rows and return their targets,
+    picking new ones where the timer ran out or the target was reached.
+    """
+    target_x = _target_x[rows]
+    target_z = _target_z[rows]
+    time_left = _time_left[rows]
+    
+    # New agents: first target and a full timer, then counted down like the others
+    retarget(np.isnan(time_left), target_x, target_z, time_left, current_x, current_z)
+    time_left -= DECISION_INTERVAL
+    
+    # Timer ran out or target reached? Pick a new one (single draw for both)
+    dx = target_x - current_x
+    dz = target_z - current_z
+    retarget((time_left <= 0) | (dx * dx + dz * dz < ARRIVAL_DISTANCE_SQ),
+             target_x, target_z, time_left, current_x, current_z)
+    
+    _target_x[rows] = target_x
+    _target_z[rows] = target_z
+    _time_left[rows] = time_left
+    return target_x, target_z
 
-def calculate_distance(x1, z1, x2, z2):
-    """Euclidean distance between two points."""
-    dx = x2 - x1
-    dz = z2 - z1
-    return (dx * dx + dz * dz) ** 0.5
 
+def retarget(mask, target_x, target_z, time_left, current_x, current_z):
+    """Give the masked agents a new random target and reset their timer."""
+    count = int(np.count_nonzero(mask))
+    if count == 0:
+        return
+    target_x[mask] = current_x[mask] + _rng.uniform(-WANDER_RANGE, WANDER_RANGE, count)
+    target_z[mask] = current_z[mask] + _rng.uniform(-WANDER_RANGE, WANDER_RANGE, count)
+    time_left[mask] = WANDER_INTERVAL
 
-def build_response(target_x, target_z, movement_type, action_type):
-    """
-    Build the response dict in the format C# expects.
-    
-    Movement types: "walk", "run", "stop", "none"
-    Action types: "none", "sneeze", "cough", "attack", "bite", "claw", etc.
-    """
-    return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_x,
-            "target_z": target_z
-        },
-        "action": {
-            "type": action_type,
-            "target_id": "",
-            "parameters": {}
-        }
-    }
@@ -2,22 +2,29 @@
 Gathering Behavior - Points d'Intérêt
 Les agents se rassemblent autour de points d'intérêt pour favoriser la propagation.
 Démontre l'impact des rassemblements sur la transmission d'épidémie.
+
+Les décisions sont calculées en lot : decide_all_columns() copie les
+perceptions dans des tableaux NumPy (un tableau par champ) puis applique
+chaque règle à tous les agents d'un coup.
 """
 
-import random
 import math
 
+import numpy as np
+
+from _codes import MOVE_WALK, MOVE_RUN, MOVE_STOP, ACT_NONE, ACT_SNEEZE, ACT_COUGH, ACT_QUARANTINE
+from _codes import stop_columns, columns_to_responses
+from _core import score_pois, pick_weighted, flee_dir
+
 # =========================
 # ===== CONFIGURATION =====
 # =========================
 
-# Points d'intérêt dans le monde
-POINTS_OF_INTEREST = [
-    {'x': 15.0, 'z': 15.0, 'name': 'Marché', 'attraction': 0.8},
-    {'x': -15.0, 'z': 15.0, 'name': 'Fontaine', 'attraction': 0.6},
-    {'x': 15.0, 'z': -15.0, 'name': 'Temple', 'attraction': 0.5},
-    {'x': -15.0, 'z': -15.0, 'name': 'Taverne', 'attraction': 0.7},
-]
+# Points d'intérêt dans le monde (un tableau par champ, même index = même POI)
+POI_NAMES = ['Marché', 'Fontaine', 'Temple', 'Taverne']
+POI_X = np.array([15.0, -15.0, 15.0, -15.0])
+POI_Z = np.array([15.0, 15.0, -15.0, -15.0])
+POI_ATTR = np.array([0.8, 0.6, 0.5, 0.7])
 
 # Durée de séjour aux POI
 STAY_DURATION_MIN = 5.0
@@ -27,6 +34,11 @@ DECISION_INTERVAL = 0.5  # Intervalle entre décisions (ne pas modifier)
 
 POI_SPREAD_RADIUS = 4.0       # Rayon de dispersion
 ARRIVAL_THRESHOLD = 2.5       # Distance pour considérer qu'on est arrivé
+STOP_THRESHOLD = 0.5          # Distance sous laquelle on s'arrête
+
+# Seuils au carré : on compare dx² + dz² sans calculer de racine
+ARRIVAL_THRESHOLD_SQ = ARRIVAL_THRESHOLD ** 2
+STOP_THRESHOLD_SQ = STOP_THRESHOLD ** 2
 
 # Comportements contagieux
 SNEEZE_CHANCE_BASE = 0.2      # Chance de base d'éternuer
@@ -37,275 +49,356 @@ CROWD_BONUS = 0.1             # Bonus par agent proche
 HEALTHY_AVOIDANCE_ENABLED = True
 AVOIDANCE_DISTANCE = 5.0
 FLEE_CHANCE = 0.3
+SYMPTOM_ACTIONS = frozenset(('sneeze', 'cough'))  # Actions qui trahissent un contagieux
 
 # Quarantaine
 SICK_SEEK_QUARANTINE = True
 QUARANTINE_HEALTH_THRESHOLD = 50
 
-agent_states = {}  # {agent_id: {'target_x', 'target_z', 'has_target'}}
+MAX_AGENTS = 256  # Taille initiale des tampons (agrandis automatiquement)
+
+# Champs de perception lus par decide_batch (vérifiés une fois par lot)
+REQUIRED_KEYS = ('my_id', 'my_x', 'my_z', 'health', 'is_contagious',
+                 'infection_stage', 'heard_count', 'visible_count')
+
+_rng = np.random.default_rng()  # Générateur PCG64, tirages par lots
+
+# Action selon le nombre de seuils dépassés par le tirage (voir decide_contagious_actions)
+_CONTAGIOUS_ACTIONS = np.array([ACT_SNEEZE, ACT_COUGH, ACT_NONE], dtype=np.int8)
+
+# Positions des POI en (n, 2), pour le calcul vectorisé / compilé des poids
+_POI_XZ = np.column_stack((POI_X, POI_Z))
+
+# =========================
+# ===== ÉTAT PERSISTANT ===
+# =========================
+# Un tableau par champ (SoA), une case par agent déjà vu ;
+# _state_idx donne la case de chaque agent
+
+_current_poi = np.full(MAX_AGENTS, -1, dtype=np.int16)  # Index du POI actuel (-1 si aucun)
+_target_x = np.zeros(MAX_AGENTS, dtype=np.float32)
+_target_z = np.zeros(MAX_AGENTS, dtype=np.float32)
+_is_traveling = np.zeros(MAX_AGENTS, dtype=bool)
+_time_at_poi = np.zeros(MAX_AGENTS, dtype=np.float32)
+_stay_duration = np.zeros(MAX_AGENTS, dtype=np.float32)
+_state_idx = {}  # {agent_id: case dans les tableaux d'état}
+
+
+def _new_state(x, z):
+    """Réserve une case d'état pour un nouvel agent, posté à (x, z)."""
+    global _current_poi, _target_x, _target_z, _is_traveling, _time_at_poi, _stay_duration
+
+    idx = len(_state_idx)
+    if idx == len(_current_poi):
+        _current_poi = np.concatenate((_current_poi, np.full_like(_current_poi, -1)))
+        _target_x = np.concatenate((_target_x, np.zeros_like(_target_x)))
+        _target_z = np.concatenate((_target_z, np.zeros_like(_target_z)))
+        _is_traveling = np.concatenate((_is_traveling, np.zeros_like(_is_traveling)))
+        _time_at_poi = np.concatenate((_time_at_poi, np.zeros_like(_time_at_poi)))
+        _stay_duration = np.concatenate((_stay_duration, np.zeros_like(_stay_duration)))
+
+    _target_x[idx] = x
+    _target_z[idx] = z
+    return idx
+
+# =========================
+# ===== TAMPONS NUMPY =====
+# =========================
+# Alloués une fois, réutilisés à chaque appel de decide_all_columns
+
+_pos_xz = np.empty((MAX_AGENTS, 2), dtype=np.float32)
+_health = np.empty(MAX_AGENTS, dtype=np.float32)
+_contagious = np.empty(MAX_AGENTS, dtype=np.float32)
+_stage = np.empty(MAX_AGENTS, dtype=np.int32)
+_crowd = np.empty(MAX_AGENTS, dtype=np.int32)
+_slots = np.empty(MAX_AGENTS, dtype=np.intp)
+
+
+def _ensure_capacity(n):
+    """Agrandit les tampons si le nombre d'agents dépasse leur taille."""
+    global MAX_AGENTS, _pos_xz, _health, _contagious, _stage, _crowd, _slots
+
+    if n <= MAX_AGENTS:
+        return
+
+    MAX_AGENTS = max(n, MAX_AGENTS * 2)
+    _pos_xz = np.empty((MAX_AGENTS, 2), dtype=np.float32)
+    _health = np.empty(MAX_AGENTS, dtype=np.float32)
+    _contagious = np.empty(MAX_AGENTS, dtype=np.float32)
+    _stage = np.empty(MAX_AGENTS, dtype=np.int32)
+    _crowd = np.empty(MAX_AGENTS, dtype=np.int32)
+    _slots = np.empty(MAX_AGENTS, dtype=np.intp)
+
 
 # =========================
 # ===== BATCH WRAPPER =====
 # =========================
 
 def decide_all(all_perceptions):
+    """
+    Mêmes décisions que decide_all_columns, une réponse par agent :
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
     """
     Point d'entrée appelé par Unity.
+    Renvoie les décisions en colonnes (une liste par champ) :
+    {"ids", "movement_type", "target_x", "target_z", "action_type"}.
+    En cas d'erreur, tous les agents s'arrêtent.
     """
-    all_decisions = {}
-    
-    for agent_id, perception in all_perceptions.items():
-        try:
-            decision = decide_action(perception)
-            all_decisions[agent_id] = decision
-        except Exception as e:
-            print(f"[ERROR] Agent {agent_id}: {e}")
-            all_decisions[agent_id] = build_response(
-                perception['my_x'], 
-                perception['my_z'], 
-                "stop", 
-                "none"
-            )
-    
-    return all_decisions
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        print(f"[ERROR] Batch: {e}")
+        return stop_columns(all_perceptions)
 
 
 # =========================
 # ===== AGENT LOGIC =======
 # =========================
 
-def decide_action(perception):
-    my_id = perception['my_id']
-    my_x = perception['my_x']
-    my_z = perception['my_z']
-    health = perception['health']
-    is_contagious = perception['is_contagious'] == 1
-    infection_stage = perception['infection_stage']
-
-    
-    # Initialiser l'état
-    if my_id not in agent_states:
-        agent_states[my_id] = {
-            'current_poi': None,
-            'target_x': my_x,
-            'target_z': my_z,
-            'is_traveling': False,
-            'time_at_poi': 0.0,
-            'stay_duration': 0.0
-        }
-    
-    state = agent_states[my_id]
+def decide_batch(all_perceptions):
+    """
+    Décide pour tous les agents à la fois.
+    Une ligne des tableaux = un agent, dans l'ordre de all_perceptions.
+    Retourne les décisions en colonnes (voir decide_all_columns).
+    """
+    agent_ids = list(all_perceptions)
+    perceptions = list(all_perceptions.values())
+    n = len(perceptions)
+    if n == 0:
+        return {"ids": [], "movement_type": [], "target_x": [], "target_z": [], "action_type": []}
+
+    # Le format vient de C# et est le même pour tous : un seul contrôle par lot
+    missing = [key for key in REQUIRED_KEYS if key not in perceptions[0]]
+    if missing:
+        raise KeyError(f"perception incomplète, champs manquants : {missing}")
+
+    _ensure_capacity(n)
+    pos = _pos_xz[:n]
+    health = _health[:n]
+    contagious = _contagious[:n]
+    stage = _stage[:n]
+    crowd = _crowd[:n]
+    slots = _slots[:n]
+
+    # Une seule passe sur les dicts : perception -> tableaux
+    for i, perception in enumerate(perceptions):
+        my_id = perception['my_id']
+        my_x = perception['my_x']
+        my_z = perception['my_z']
+
+        # Initialiser l'état
+        idx = _state_idx.get(my_id)
+        if idx is None:
+            idx = _state_idx[my_id] = _new_state(my_x, my_z)
+        slots[i] = idx
+
+        pos[i, 0] = my_x
+        pos[i, 1] = my_z
+        health[i] = perception['health']
+        contagious[i] = perception['is_contagious']
+        stage[i] = perception['infection_stage']
+        crowd[i] = max(perception['heard_count'], perception['visible_count'])
+
+    # État des agents du lot (copies contiguës, réécrites à la fin)
+    target_x = _target_x[slots]
+    target_z = _target_z[slots]
+    traveling = _is_traveling[slots]
+    time_at_poi = _time_at_poi[slots]
+    stay_duration = _stay_duration[slots]
+    current_poi = _current_poi[slots]
+
+    my_x = pos[:, 0]
+    my_z = pos[:, 1]
+    is_contagious = contagious == 1
+
+    movement = np.full(n, MOVE_WALK, dtype=np.int8)
+    action = np.full(n, ACT_NONE, dtype=np.int8)
+    out_x = my_x.copy()
+    out_z = my_z.copy()
 
     # === PRIORITÉ 1: Malades cherchent quarantaine ===
-    if SICK_SEEK_QUARANTINE and is_contagious and health < QUARANTINE_HEALTH_THRESHOLD:
-        return build_response(my_x, my_z, "stop", "quarantine")
-    
+    quarantined = np.zeros(n, dtype=bool)
+    if SICK_SEEK_QUARANTINE:
+        quarantined = is_contagious & (health < QUARANTINE_HEALTH_THRESHOLD)
+    movement[quarantined] = MOVE_STOP
+    action[quarantined] = ACT_QUARANTINE
+
     # === PRIORITÉ 2: Sains évitent les contagieux ===
-    if HEALTHY_AVOIDANCE_ENABLED and not is_contagious and infection_stage == 0:
-        contagious_nearby = detect_contagious_nearby(perception)
-        if contagious_nearby and random.random() < FLEE_CHANCE:
-            flee_x, flee_z = calculate_flee_direction(my_x, my_z, contagious_nearby, perception)
-            return build_response(flee_x, flee_z, "run", "none")
-    
+    fleeing = np.zeros(n, dtype=bool)
+    if HEALTHY_AVOIDANCE_ENABLED:
+        # Le tirage est fait avant la détection : inutile de parcourir
+        # visible_agents pour un agent qui ne fuira pas de toute façon
+        candidates = np.flatnonzero(
+            ~is_contagious & (stage == 0) & (_rng.random(n) < FLEE_CHANCE)
+        )
+        found, avg_x, avg_z = detect_contagious_nearby([perceptions[i] for i in candidates])
+        fleeing[candidates[found]] = True
+
+        if fleeing.any():
+            flee_x, flee_z = calculate_flee_directions(
+                my_x[fleeing], my_z[fleeing], avg_x, avg_z
+            )
+            out_x[fleeing] = flee_x
+            out_z[fleeing] = flee_z
+            movement[fleeing] = MOVE_RUN
+
+    # === DÉPLACEMENT ENTRE POI ===
+    active = ~quarantined & ~fleeing
+
     # Vérifier si on est arrivé à destination
-    dist_to_target = calculate_distance(my_x, my_z, state['target_x'], state['target_z'])
-    
-    if dist_to_target < ARRIVAL_THRESHOLD and state['is_traveling']:
-        # On vient d'arriver
-        state['is_traveling'] = False
-        state['time_at_poi'] = 0.0
-        state['target_x'] = my_x
-        state['target_z'] = my_z
-    
+    dx = target_x - my_x
+    dz = target_z - my_z
+    dist_sq_to_target = dx * dx + dz * dz
+
+    # On vient d'arriver
+    arrived = active & traveling & (dist_sq_to_target < ARRIVAL_THRESHOLD_SQ)
+    traveling[arrived] = False
+    time_at_poi[arrived] = 0.0
+    target_x[arrived] = my_x[arrived]
+    target_z[arrived] = my_z[arrived]
+
     # Incrémenter le temps si on est à un POI
-    if not state['is_traveling']:
-        state['time_at_poi'] += DECISION_INTERVAL
-    
+    waiting = active & ~traveling
+    time_at_poi[waiting] += DECISION_INTERVAL
+
     # Temps écoulé ? Choisir nouveau POI
-    if not state['is_traveling']:
-        if state['current_poi'] is None or state['time_at_poi'] >= state['stay_duration']:
-            # Choisir nouveau POI
-            new_poi = choose_new_poi(my_x, my_z, state['current_poi'])
-            state['current_poi'] = new_poi
-            
-            # Position dispersée autour du POI
-            state['target_x'], state['target_z'] = generate_random_position_around(
-                new_poi['x'],
-                new_poi['z'],
-                POI_SPREAD_RADIUS
-            )
-            
-            state['is_traveling'] = True
-            state['time_at_poi'] = 0.0
-            state['stay_duration'] = random.uniform(STAY_DURATION_MIN, STAY_DURATION_MAX)
-    
+    choosing = waiting & ((current_poi == -1) | (time_at_poi >= stay_duration))
+    m = int(np.count_nonzero(choosing))
+    if m:
+        new_poi = choose_new_pois(my_x[choosing], my_z[choosing], current_poi[choosing])
+        current_poi[choosing] = new_poi
+
+        # Position dispersée autour du POI
+        target_x[choosing], target_z[choosing] = generate_random_positions_around(
+            POI_X[new_poi],
+            POI_Z[new_poi],
+            POI_SPREAD_RADIUS
+        )
+
+        traveling[choosing] = True
+        time_at_poi[choosing] = 0.0
+        stay_duration[choosing] = _rng.uniform(STAY_DURATION_MIN, STAY_DURATION_MAX, m)
+
     # Déterminer le type de mouvement
-    if state['is_traveling']:
-        movement_type = "run"
-    elif dist_to_target < 0.5:
-        movement_type = "stop"
-    else:
-        movement_type = "walk"
+    movement[active & (dist_sq_to_target < STOP_THRESHOLD_SQ)] = MOVE_STOP
+    movement[active & traveling] = MOVE_RUN
+    out_x[active] = target_x[active]
+    out_z[active] = target_z[active]
 
     # Déterminer l'action
-    action_type = "none"
-    if is_contagious:
-        action_type = decide_contagious_action(perception)
-    
-    return build_response(state['target_x'], state['target_z'], movement_type, action_type)
+    sick = active & is_contagious
+    action[sick] = decide_contagious_actions(crowd[sick])
+
+    # Sauvegarder l'état persistant
+    # (seules les lignes actives ont changé : les autres sont réécrites à l'identique)
+    _target_x[slots] = target_x
+    _target_z[slots] = target_z
+    _is_traveling[slots] = traveling
+    _time_at_poi[slots] = time_at_poi
+    _stay_duration[slots] = stay_duration
+    _current_poi[slots] = current_poi
+
+    return {
+        "ids": agent_ids,
+        "movement_type": movement.tolist(),
+        "target_x": out_x.tolist(),
+        "target_z": out_z.tolist(),
+        "action_type": action.tolist()
+    }
 
 
 # =========================
 # ===== UTILITIES =========
 # =========================
 
-def build_response(target_x, target_z, movement_type, action_type):
+def generate_random_positions_around(center_x, center_z, radius):
     """
-    Construit la réponse pour Unity.
+    Génère une position aléatoire dans un rayon autour de chaque centre.
     """
-    return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_x,
-            "target_z": target_z
-        },
-        "action": {
-            "type": action_type,
-            "target_id": "",
-            "parameters": {}
-        }
-    }
+    n = len(center_x)
+    angle = _rng.uniform(0, 2 * math.pi, n)
+    distance = _rng.uniform(0, radius, n)
+
+    offset_x = np.cos(angle) * distance
+    offset_z = np.sin(angle) * distance
 
-def generate_random_position_around(center_x, center_z, radius):
-    """
-    Génère une position aléatoire dans un rayon autour d'un centre.
-    """
-    angle = random.uniform(0, 2 * math.pi)
-    distance = random.uniform(0, radius)
-    
-    offset_x = math.cos(angle) * distance
-    offset_z = math.sin(angle) * distance
-    
     return center_x + offset_x, center_z + offset_z
 
 
-def calculate_distance(x1, z1, x2, z2):
-    """Distance euclidienne 2D."""
-    dx = x2 - x1
-    dz = z2 - z1
-    return math.sqrt(dx * dx + dz * dz)
+def decide_contagious_actions(crowd_size):
+    """
+    Décider si chaque agent contagieux doit éternuer ou tousser.
+    crowd_size : max(heard_count, visible_count) par agent.
+    """
+    # Bonus de probabilité basé sur la foule ; pas de monde, pas d'action
+    crowd_multiplier = np.minimum(1.5, 1.0 + crowd_size * CROWD_BONUS) * (crowd_size > 0)
 
+    sneeze_cut = SNEEZE_CHANCE_BASE * crowd_multiplier
+    cough_cut = sneeze_cut + COUGH_CHANCE_BASE * crowd_multiplier
 
-def choose_random_poi():
-    """Choisit un point d'intérêt au hasard."""
-    return random.choice(POINTS_OF_INTEREST)
+    roll = _rng.random(len(crowd_size))
 
-def decide_contagious_action(perception):
-    """
-    Décider si l'agent doit éternuer ou tousser.
-    """
-    heard_count = perception['heard_count']
-    visible_count = perception['visible_count']
-    
-    # Pas de monde ? Pas besoin d'action
-    if heard_count == 0 and visible_count == 0:
-        return "none"
-    
-    # Bonus de probabilité basé sur la foule
-    crowd_size = max(heard_count, visible_count)
-    crowd_multiplier = min(1.5, 1.0 + (crowd_size * CROWD_BONUS))
-    
-    sneeze_chance = SNEEZE_CHANCE_BASE * crowd_multiplier
-    cough_chance = COUGH_CHANCE_BASE * crowd_multiplier
-    
-    roll = random.random()
-    
-    if roll < sneeze_chance:
-        return "sneeze"
-    elif roll < sneeze_chance + cough_chance:
-        return "cough"
-    
-    return "none"
-
-def choose_new_poi(current_x, current_z, current_poi):
+    # 0 seuil dépassé -> éternuer, 1 -> tousser, 2 -> rien
+    passed = (roll >= sneeze_cut).astype(np.intp) + (roll >= cough_cut)
+    return _CONTAGIOUS_ACTIONS[passed]
+
+def choose_new_pois(current_x, current_z, current_poi):
     """
-    Choisir un POI basé sur distance, attraction et variété.
+    Choisir un POI par agent basé sur distance, attraction et variété.
+    current_poi : index du POI actuel de chaque agent (-1 si aucun).
+    Retourne l'index du POI choisi pour chaque agent.
     """
-    weights = []
-    
-    for poi in POINTS_OF_INTEREST:
-        # Ne pas rechoisir le POI actuel
-        if current_poi and poi['name'] == current_poi['name']:
-            weights.append(0.0)
-            continue
-        
-        # Score basé sur distance (plus proche = mieux)
-        dist = calculate_distance(current_x, current_z, poi['x'], poi['z'])
-        dist_score = 1.0 / (1.0 + dist * 0.1)
-        
-        # Score basé sur attraction
-        attraction_score = poi['attraction']
-        
-        # Score total
-        total_score = dist_score * attraction_score
-        weights.append(total_score)
-    
+    # Score = attraction / (1 + distance * 0.1), POI actuel exclu
+    weights = score_pois(current_x, current_z, _POI_XZ, POI_ATTR, current_poi)
+
     # Choix pondéré
-    total_weight = sum(weights)
-    if total_weight == 0:
-        return random.choice(POINTS_OF_INTEREST)
-    
-    rand = random.uniform(0, total_weight)
-    cumulative = 0
-    
-    for poi, weight in zip(POINTS_OF_INTEREST, weights):
-        cumulative += weight
-        if rand <= cumulative:
-            return poi
-    
-    return POINTS_OF_INTEREST[-1]
-
-def detect_contagious_nearby(perception):
+    return pick_weighted(weights, _rng.random(len(current_x)))
+
+def detect_contagious_nearby(perceptions, _avoidance_distance=AVOIDANCE_DISTANCE,
+                             _symptom_actions=SYMPTOM_ACTIONS):
     """
-    Détecte les agents contagieux à proximité.
-    Retourne une liste de positions ou None.
+    Détecte les agents contagieux à proximité, pour plusieurs agents à la fois.
+    Une seule passe sur tous les visible_agents, puis moyennes par bincount.
+    Retourne (trouvé, x moyen, z moyen) : trouvé a un élément par perception,
+    les moyennes un par agent trouvé.
     """
-    contagious = []
-    
-    visible_agents = perception.get('visible_agents', {})
-    for agent_id, agent_data in visible_agents.items():
-        if agent_data['distance'] < AVOIDANCE_DISTANCE:
-            # Heuristique : si l'agent éternue/tousse, il est contagieux
-            if agent_data['current_action'] in ['sneeze', 'cough']:
-                contagious.append((agent_data['x'], agent_data['z']))
-    
-    return contagious if contagious else None
-
-def calculate_flee_direction(my_x, my_z, contagious_positions, perception):
+    m = len(perceptions)
+
+    # Heuristique : si l'agent éternue/tousse, il est contagieux
+    hits = [
+        (i, agent_data['x'], agent_data['z'])
+        for i, perception in enumerate(perceptions)
+        for agent_data in perception.get('visible_agents', {}).values()
+        if agent_data['distance'] < _avoidance_distance
+        and agent_data['current_action'] in _symptom_actions
+    ]
+    if not hits:
+        return np.zeros(m, dtype=bool), np.zeros(0), np.zeros(0)
+
+    owner, hit_x, hit_z = np.array(hits).T
+    owner = owner.astype(np.intp)
+    count = np.bincount(owner, minlength=m)
+    found = count > 0
+    avg_x = np.bincount(owner, weights=hit_x, minlength=m)[found] / count[found]
+    avg_z = np.bincount(owner, weights=hit_z, minlength=m)[found] / count[found]
+    return found, avg_x, avg_z
+
+def calculate_flee_directions(my_x, my_z, avg_x, avg_z):
     """
-    Calcule une direction de fuite opposée aux contagieux.
+    Calcule une direction de fuite opposée aux contagieux, pour chaque agent.
+    avg_x, avg_z : position moyenne des contagieux vus par chaque agent.
     """
-    # Position moyenne des contagieux
-    avg_x = sum(pos[0] for pos in contagious_positions) / len(contagious_positions)
-    avg_z = sum(pos[1] for pos in contagious_positions) / len(contagious_positions)
-    
-    # Direction opposée
-    flee_dir_x = my_x - avg_x
-    flee_dir_z = my_z - avg_z
-    
-    # Normaliser
-    magnitude = math.sqrt(flee_dir_x**2 + flee_dir_z**2)
-    if magnitude > 0:
-        flee_dir_x /= magnitude
-        flee_dir_z /= magnitude
-    else:
-        # Direction aléatoire si pile dessus
-        angle = random.uniform(0, 2 * math.pi)
-        flee_dir_x = math.cos(angle)
-        flee_dir_z = math.sin(angle)
-    
+    # Direction opposée normalisée (aléatoire si pile dessus)
+    fallback_angle = _rng.uniform(0, 2 * math.pi, len(my_x))
+    flee_dir_x, flee_dir_z = flee_dir(my_x, my_z, avg_x, avg_z, fallback_angle)
+
     # Fuir à 10 unités
     flee_x = my_x + flee_dir_x * 10.0
     flee_z = my_z + flee_dir_z * 10.0
-    
-    return flee_x, flee_z
\ No newline at end of file
+
+    return flee_x, flee_z
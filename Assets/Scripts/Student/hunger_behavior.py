@@ -6,11 +6,18 @@ Search Logic:
 - Agent faces movement direction (handled by MovementController)
 - Each search step = look in one 90° sector
 - After 4 steps: full area scanned, move elsewhere and repeat
+
+Decisions are computed in batch: decide_all_columns() reads every perception
+into NumPy arrays and applies each rule to all agents at once.
 """
 
-import random
 import math
 
+import numpy as np
+
+from _codes import MOVE_WALK, MOVE_RUN, MOVE_STOP, ACT_NONE, ACT_EAT, stop_columns, columns_to_responses
+from _core import closest_hits
+
 # =========================
 # ===== CONFIGURATION =====
 # =========================
@@ -24,13 +31,61 @@ SEARCH_STEP_DISTANCE = 2.0   # How far to step in each direction
 SEARCH_DIRECTIONS = 4        # 360° ÷ 90° FOV = 4 directions needed
 ANGLE_PER_STEP = math.pi / 2 # 90° in radians (π/2)
 
+# Rotation of each search step relative to the pattern's base direction
+_STEP_COS = np.cos(np.arange(SEARCH_DIRECTIONS) * ANGLE_PER_STEP)
+_STEP_SIN = np.sin(np.arange(SEARCH_DIRECTIONS) * ANGLE_PER_STEP)
+
 # =========================
 # ===== GLOBAL STATE ======
 # =========================
+# One row per agent ever seen; agent_rows gives each agent's row
+
+MAX_AGENTS = 256  # Initial row count (grows automatically)
+
+agent_rows = {}   # {agent_id: row}
+
+# Wander state
+_wandering = np.zeros(MAX_AGENTS, dtype=bool)   # Has a wander target/timer
+_wander_timer = np.zeros(MAX_AGENTS)
+_wander_x = np.zeros(MAX_AGENTS)
+_wander_z = np.zeros(MAX_AGENTS)
 
-wander_targets = {}
-behavior_timers = {}
-search_data = {}  # {agent_id: {'center_x', 'center_z', 'step', 'base_angle'}}
+# Search state
+_searching = np.zeros(MAX_AGENTS, dtype=bool)   # Has a search pattern in progress
+_search_cx = np.zeros(MAX_AGENTS)               # Center of the current pattern
+_search_cz = np.zeros(MAX_AGENTS)
+_search_step = np.zeros(MAX_AGENTS, dtype=np.int64)
+_search_cos = np.zeros(MAX_AGENTS)              # Base direction of the current pattern
+_search_sin = np.zeros(MAX_AGENTS)
+
+_rng = np.random.default_rng()
+
+
+def agent_row(agent_id):
+    """Row of this agent in the state arrays (allocated on first sight)."""
+    row = agent_rows.get(agent_id)
+    if row is None:
+        row = agent_rows[agent_id] = len(agent_rows)
+        if row == len(_wandering):
+            _grow_state()
+    return row
+
+
+def _grow_state():
+    """Double the state arrays; new rows start with no wander/search state."""
+    global _wandering, _wander_timer, _wander_x, _wander_z
+    global _searching, _search_cx, _search_cz, _search_step, _search_cos, _search_sin
+    
+    _wandering = np.concatenate((_wandering, np.zeros_like(_wandering)))
+    _wander_timer = np.concatenate((_wander_timer, np.zeros_like(_wander_timer)))
+    _wander_x = np.concatenate((_wander_x, np.zeros_like(_wander_x)))
+    _wander_z = np.concatenate((_wander_z, np.zeros_like(_wander_z)))
+    _searching = np.concatenate((_searching, np.zeros_like(_searching)))
+    _search_cx = np.concatenate((_search_cx, np.zeros_like(_search_cx)))
+    _search_cz = np.concatenate((_search_cz, np.zeros_like(_search_cz)))
+    _search_step = np.concatenate((_search_step, np.zeros_like(_search_step)))
+    _search_cos = np.concatenate((_search_cos, np.zeros_like(_search_cos)))
+    _search_sin = np.concatenate((_search_sin, np.zeros_like(_search_sin)))
 
 
 # =========================
@@ -38,86 +93,134 @@ search_data = {}  # {agent_id: {'center_x', 'center_z', 'step', 'base_angle'}}
 # =========================
 
 def decide_all(all_perceptions):
-    all_decisions = {}
-    
-    for agent_id, perception in all_perceptions.items():
-        try:
-            decision = decide_action(perception)
-            all_decisions[agent_id] = decision
-        except Exception as e:
-            print(f"Error processing {agent_id}: {e}")
-            all_decisions[agent_id] = build_response(0, 0, "stop", "none", "")
-    
-    return all_decisions
+    """
+    Same decisions as decide_all_columns, one response dict per agent:
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
+    """
+    Called by Unity once per decision cycle with ALL agents' perception data.
+    Returns the decisions as one list per field:
+    {"ids", "movement_type", "target_x", "target_z", "action_type", "target_id"}.
+    """
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        # On error, every agent stops
+        print(f"Error processing hunger batch: {e}")
+        return stop_columns(all_perceptions)
 
 
 # =========================
 # ===== AGENT LOGIC =======
 # =========================
 
-def decide_action(perception):
-    my_id = perception["my_id"]
-    my_x = perception["my_x"]
-    my_z = perception["my_z"]
-    hunger = perception["hunger"]
-    visible_food = perception["visible_food"]
-    my_state = perception["my_state"]
-    
-    # Dead agents do nothing
-    if my_state == "Dead":
-        return build_response(0, 0, "stop", "none", "")
-    
-    # === HUNGRY: Find and eat food ===
-    if hunger < HUNGER_THRESHOLD:
-        
-        # Clear wander state when switching to hungry mode
-        if my_id in wander_targets:
-            del wander_targets[my_id]
-        if my_id in behavior_timers:
-            del behavior_timers[my_id]
-        
-        if visible_food:
-            # Food found! Clear search state and go eat
-            if my_id in search_data:
-                del search_data[my_id]
-            
-            closest = find_closest_food(my_x, my_z, visible_food)
-            return build_response(closest["x"], closest["z"], "run", "eat", closest["id"])
-        
-        else:
-            # No food visible - search systematically
-            target_x, target_z = search_for_food(my_id, my_x, my_z)
-            return build_response(target_x, target_z, "walk", "none", "")
-    
-    # === NOT HUNGRY: Wander randomly ===
-    # Clear search state when no longer hungry
-    if my_id in search_data:
-        del search_data[my_id]
-    
-    return wander(my_id, my_x, my_z)
+def decide_batch(all_perceptions):
+    """
+    Decide for all agents at once, one array element per agent.
+    Returns the decisions as columns (see decide_all_columns).
+    """
+    agent_ids = list(all_perceptions)
+    perceptions = list(all_perceptions.values())
+    n = len(perceptions)
+    if n == 0:
+        return {"ids": [], "movement_type": [], "target_x": [], "target_z": [], "action_type": [], "target_id": []}
+    
+    my_x = np.fromiter((p["my_x"] for p in perceptions), dtype=np.float64, count=n)
+    my_z = np.fromiter((p["my_z"] for p in perceptions), dtype=np.float64, count=n)
+    hunger = np.fromiter((p["hunger"] for p in perceptions), dtype=np.float64, count=n)
+    dead = np.fromiter((p["my_state"] == "Dead" for p in perceptions), dtype=bool, count=n)
+    sees_food = np.fromiter((bool(p["visible_food"]) for p in perceptions), dtype=bool, count=n)
+    rows = np.fromiter((agent_row(p["my_id"]) for p in perceptions), dtype=np.intp, count=n)
+    
+    # Dead agents do nothing (stop at 0, 0)
+    movement = np.full(n, MOVE_STOP, dtype=np.int8)
+    action = np.full(n, ACT_NONE, dtype=np.int8)
+    out_x = np.zeros(n)
+    out_z = np.zeros(n)
+    target_ids = [""] * n
+    
+    alive = ~dead
+    hungry = alive & (hunger < HUNGER_THRESHOLD)
+    eating = hungry & sees_food
+    searching = hungry & ~sees_food
+    wandering = alive & ~hungry
+    
+    # Clear wander state when switching to hungry mode,
+    # and search state once food is found or hunger is gone
+    _wandering[rows[hungry]] = False
+    _searching[rows[eating | wandering]] = False
+    
+    # === HUNGRY, FOOD VISIBLE: go eat the closest plate ===
+    eaters = np.flatnonzero(eating)
+    if len(eaters):
+        out_x[eaters], out_z[eaters], food_ids = find_closest_food(
+            my_x[eaters], my_z[eaters], [perceptions[i]["visible_food"] for i in eaters]
+        )
+        for i, food_id in zip(eaters.tolist(), food_ids):
+            target_ids[i] = food_id
+    movement[eating] = MOVE_RUN
+    action[eating] = ACT_EAT
+    
+    # === HUNGRY, NO FOOD: search systematically ===
+    if searching.any():
+        out_x[searching], out_z[searching] = search_for_food(
+            rows[searching], my_x[searching], my_z[searching]
+        )
+        movement[searching] = MOVE_WALK
+    
+    # === NOT HUNGRY: wander randomly ===
+    if wandering.any():
+        out_x[wandering], out_z[wandering], movement[wandering] = wander(
+            rows[wandering], my_x[wandering], my_z[wandering]
+        )
+    
+    return {
+        "ids": agent_ids,
+        "movement_type": movement.tolist(),
+        "target_x": out_x.tolist(),
+        "target_z": out_z.tolist(),
+        "action_type": action.tolist(),
+        "target_id": target_ids
+    }
 
 
 # =========================
 # ===== FOOD SEARCH =======
 # =========================
 
-def find_closest_food(my_x, my_z, visible_food):
-    """Find the nearest visible food plate."""
-    closest = None
-    best_dist = float('inf')
+def find_closest_food(my_x, my_z, visible_foods):
+    """
+    Find the nearest visible food plate of each agent.
+    visible_foods holds one non-empty visible_food dict per agent.
+    
+    All plates are flattened into one array and handed to the closest_hits
+    kernel; ties keep the first plate, as in visible_food order.
+    
+    Returns:
+        (food_x, food_z, food_ids) of the chosen plates
+    """
+    counts = np.fromiter(map(len, visible_foods), dtype=np.intp, count=len(visible_foods))
+    total = int(counts.sum())
+    
+    food_ids = [food_id for foods in visible_foods for food_id in foods]
+    food_x = np.fromiter((f['x'] for foods in visible_foods for f in foods.values()), dtype=np.float64, count=total)
+    food_z = np.fromiter((f['z'] for foods in visible_foods for f in foods.values()), dtype=np.float64, count=total)
     
-    for food_id, food_data in visible_food.items():
-        dist = math.hypot(food_data['x'] - my_x, food_data['z'] - my_z)
-        if dist < best_dist:
-            best_dist = dist
-            closest = {"id": food_id, "x": food_data["x"], "z": food_data["z"]}
+    # Every agent sees at least one plate: no range limit, always a match
+    owner = np.repeat(np.arange(len(counts)), counts)
+    best, _ = closest_hits(owner, food_x, food_z, my_x, my_z, np.full(len(counts), np.inf))
     
-    return closest
+    return food_x[best], food_z[best], [food_ids[b] for b in best.tolist()]
 
 
-def search_for_food(agent_id, my_x, my_z):
+def search_for_food(rows, my_x, my_z):
     """
-    Look in 4 directions (90° apart) to cover full 360°.
+    Look in 4 directions (90° apart) to cover full 360°, for every
+    searching agent at once (rows = their rows in the state arrays).
     
     How it works:
     1. Pick a random starting angle
@@ -132,91 +235,94 @@ def search_for_food(agent_id, my_x, my_z):
     """
     
     # First time searching? Initialize state
-    if agent_id not in search_data:
-        search_data[agent_id] = {
-            'center_x': my_x,
-            'center_z': my_z,
-            'step': 0,
-            'base_angle': random.uniform(0, 2 * math.pi)
-        }
-    
-    data = search_data[agent_id]
+    new = ~_searching[rows]
+    if new.any():
+        start_search(rows[new], my_x[new], my_z[new])
     
     # Calculate which direction to look this step
     # step=0 → base_angle, step=1 → base_angle+90°, etc.
-    current_angle = data['base_angle'] + (data['step'] * ANGLE_PER_STEP)
+    # (base direction rotated by the step's precomputed cos/sin: no trig here)
+    step = _search_step[rows]
+    base_cos = _search_cos[rows]
+    base_sin = _search_sin[rows]
+    step_cos = _STEP_COS[step]
+    step_sin = _STEP_SIN[step]
     
     # Target point in that direction (agent will face this way)
-    target_x = data['center_x'] + math.cos(current_angle) * SEARCH_STEP_DISTANCE
-    target_z = data['center_z'] + math.sin(current_angle) * SEARCH_STEP_DISTANCE
+    target_x = _search_cx[rows] + (base_cos * step_cos - base_sin * step_sin) * SEARCH_STEP_DISTANCE
+    target_z = _search_cz[rows] + (base_sin * step_cos + base_cos * step_sin) * SEARCH_STEP_DISTANCE
     
     # Move to next direction for next cycle
-    data['step'] += 1
+    _search_step[rows] = step + 1
     
     # Completed all 4 directions? Move to new area
-    if data['step'] >= SEARCH_DIRECTIONS:
-        data['step'] = 0
-        data['center_x'] = my_x
-        data['center_z'] = my_z
-        data['base_angle'] = random.uniform(0, 2 * math.pi)
+    done = step + 1 >= SEARCH_DIRECTIONS
+    if done.any():
+        start_search(rows[done], my_x[done], my_z[done])
     
     return target_x, target_z
 
 
+def start_search(rows, my_x, my_z):
+    """Start a new 4-direction pattern around the current positions."""
+    _searching[rows] = True
+    _search_cx[rows] = my_x
+    _search_cz[rows] = my_z
+    _search_step[rows] = 0
+    base_angle = _rng.uniform(0, 2 * math.pi, len(rows))
+    _search_cos[rows] = np.cos(base_angle)
+    _search_sin[rows] = np.sin(base_angle)
+
+
 # =========================
 # ===== WANDERING =========
 # =========================
 
-def wander(agent_id, my_x, my_z):
-    """Random movement when not hungry."""
+def wander(rows, my_x, my_z):
+    """
+    Random movement when not hungry.
+    
+    Returns:
+        (target_x, target_z, movement code) arrays
+    """
     
     # Initialize wander state
-    if agent_id not in behavior_timers:
-        behavior_timers[agent_id] = 0.0
-        wander_targets[agent_id] = random_target(my_x, my_z)
+    new = ~_wandering[rows]
+    if new.any():
+        new_rows = rows[new]
+        _wandering[new_rows] = True
+        _wander_timer[new_rows] = 0.0
+        _wander_x[new_rows], _wander_z[new_rows] = random_targets(my_x[new], my_z[new])
     
     # Count down timer
-    behavior_timers[agent_id] -= DECISION_INTERVAL
+    timer = _wander_timer[rows] - DECISION_INTERVAL
     
     # Time for new destination?
-    if behavior_timers[agent_id] <= 0:
-        behavior_timers[agent_id] = random.uniform(2.0, 5.0)
-        wander_targets[agent_id] = random_target(my_x, my_z)
+    due = timer <= 0
+    if due.any():
+        due_rows = rows[due]
+        timer[due] = _rng.uniform(2.0, 5.0, len(due_rows))
+        _wander_x[due_rows], _wander_z[due_rows] = random_targets(my_x[due], my_z[due])
+    _wander_timer[rows] = timer
+    
+    target_x = _wander_x[rows]
+    target_z = _wander_z[rows]
     
-    target = wander_targets[agent_id]
+    # Randomly choose behavior: idle (20%), walk (40%) or run (40%)
+    choice = _rng.random(len(rows))
+    movement = np.full(len(rows), MOVE_RUN, dtype=np.int8)
+    movement[choice < 0.6] = MOVE_WALK
+    idle = choice < 0.2
+    movement[idle] = MOVE_STOP
+    target_x[idle] = my_x[idle]
+    target_z[idle] = my_z[idle]
     
-    # Randomly choose behavior: idle, walk, or run
-    choice = random.random()
-    if choice < 0.2:
-        return build_response(my_x, my_z, "stop", "none", "")
-    elif choice < 0.6:
-        return build_response(target[0], target[1], "walk", "none", "")
-    else:
-        return build_response(target[0], target[1], "run", "none", "")
+    return target_x, target_z, movement
 
 
-def random_target(x, z):
-    """Generate random point within wander radius."""
+def random_targets(x, z):
+    """Generate a random point within wander radius of each position."""
     return (
-        x + random.uniform(-WANDER_RADIUS, WANDER_RADIUS),
-        z + random.uniform(-WANDER_RADIUS, WANDER_RADIUS)
+        x + _rng.uniform(-WANDER_RADIUS, WANDER_RADIUS, len(x)),
+        z + _rng.uniform(-WANDER_RADIUS, WANDER_RADIUS, len(z))
     )
-
-
-# =========================
-# ===== RESPONSE BUILDER ==
-# =========================
-
-def build_response(target_x, target_z, movement_type, action_type, target_id=""):
-    return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_x,
-            "target_z": target_z
-        },
-        "action": {
-            "type": action_type,
-            "target_id": target_id,
-            "parameters": {}
-        }
-    }
\ No newline at end of file
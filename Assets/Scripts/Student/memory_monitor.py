@@ -16,6 +16,12 @@ except ImportError:
 # Track if we've started tracemalloc
 _tracemalloc_started = False
 
+# len(gc.get_objects()) walks every tracked object, so it is only
+# refreshed every GC_OBJECTS_SAMPLE_EVERY calls to get_memory_stats()
+GC_OBJECTS_SAMPLE_EVERY = 10
+_call_count = 0
+_cached_gc_objects = 0
+
 
 def start_tracking():
     """
@@ -41,15 +47,21 @@ def get_memory_stats():
     
     Returns dict with:
         - gc_objects: Number of objects tracked by garbage collector
+                      (sampled every GC_OBJECTS_SAMPLE_EVERY calls)
         - gc_garbage: Number of uncollectable objects (circular refs)
         - tracemalloc_current: Current memory usage in bytes (if available)
         - tracemalloc_peak: Peak memory usage in bytes (if available)
         - gc_counts: Tuple of (gen0, gen1, gen2) collection counts
     """
+    global _call_count, _cached_gc_objects
+    
     stats = {}
     
     # GC statistics - always available
-    stats['gc_objects'] = len(gc.get_objects())
+    if _call_count % GC_OBJECTS_SAMPLE_EVERY == 0:
+        _cached_gc_objects = len(gc.get_objects())
+    _call_count += 1
+    stats['gc_objects'] = _cached_gc_objects
     stats['gc_garbage'] = len(gc.garbage)
     stats['gc_counts'] = gc.get_count()  # (gen0, gen1, gen2) objects pending collection
     
@@ -71,6 +83,10 @@ def force_gc():
     Useful for getting accurate memory readings.
     Returns number of unreachable objects found.
     """
+    global _call_count
+    
+    # Object count changes after a collection: refresh it on the next call
+    _call_count = 0
     return gc.collect()
 
 
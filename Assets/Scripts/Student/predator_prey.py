@@ -3,15 +3,17 @@ Predator / Prey Behavior - Batch Processing Version
 Compatible with Unity PythonBehaviorController batch API
 
 How it works:
-- Unity calls decide_all() once per decision cycle with ALL agents' data
-- decide_all() calls decide_action() for each agent individually
-- Each agent still makes decisions based on its own perception data
-
-Students write their logic in decide_action() - same as before!
+- Unity calls decide_all_columns() once per decision cycle with ALL agents' data
+  (decide_all() returns the same decisions as one response dict per agent)
+- decide_batch() reads every perception into NumPy arrays (one element per
+  agent) and applies the prey / predator rules to all agents at once
+- Each agent still decides from its own perception data (its visible_agents)
 """
 
-import random
-import math
+import numpy as np
+
+from _codes import MOVE_WALK, MOVE_RUN, MOVE_STOP, ACT_NONE, ACT_KILL, stop_columns, columns_to_responses
+from _core import closest_hits
 
 # =========================
 # ===== PARAMETERS =======
@@ -20,6 +22,10 @@ import math
 PREDATOR_FACTION = "Predator"
 PREY_FACTION = "Prey"
 
+# Integer faction codes, looked up once per agent per batch
+FACTION_OTHER, FACTION_PREY, FACTION_PREDATOR = 0, 1, 2
+FACTION_CODES = {PREY_FACTION: FACTION_PREY, PREDATOR_FACTION: FACTION_PREDATOR}
+
 # Vision ranges
 PREDATOR_VISION_RADIUS = 10.0
 PREY_VISION_RADIUS = 8.0
@@ -34,15 +40,51 @@ PREDATOR_INITIAL_ENERGY = 100.0
 ENERGY_DECAY_PER_DECISION = 1.5
 ENERGY_GAIN_ON_EAT = 40.0
 
+# Squared thresholds: compare against dx*dx + dz*dz, no sqrt needed
+PREDATOR_VISION_RADIUS_SQ = PREDATOR_VISION_RADIUS * PREDATOR_VISION_RADIUS
+PREY_VISION_RADIUS_SQ = PREY_VISION_RADIUS * PREY_VISION_RADIUS
+CAPTURE_DISTANCE_SQ = CAPTURE_DISTANCE * CAPTURE_DISTANCE
+
 
 # =========================
 # ===== GLOBAL STATE ======
 # =========================
 # These persist between decision cycles, tracking state across time
+# One row per agent ever seen (acting or just seen); agent_rows gives each agent's row
+
+MAX_AGENTS = 256  # Initial row count (grows automatically)
+
+agent_rows = {}           # {agent_id: row}
+_dead = np.zeros(MAX_AGENTS, dtype=bool)  # agents that have died (stop processing them)
+
+# Predator energy of each row (NaN = not hunted yet, starts at PREDATOR_INITIAL_ENERGY)
+_energy = np.full(MAX_AGENTS, np.nan, dtype=np.float32)
+
+# Wander target of each row (NaN = none yet)
+_wander_x = np.full(MAX_AGENTS, np.nan, dtype=np.float32)
+_wander_z = np.full(MAX_AGENTS, np.nan, dtype=np.float32)
 
-predator_energy = {}      # {predator_id: current_energy}
-dead_agents = set()       # agents that have died (stop processing them)
-wander_targets = {}       # {agent_id: (target_x, target_z)}
+_rng = np.random.default_rng()
+
+
+def agent_row(agent_id):
+    """Row of this agent in the state arrays (allocated on first sight)."""
+    row = agent_rows.get(agent_id)
+    if row is None:
+        row = agent_rows[agent_id] = len(agent_rows)
+        if row == len(_dead):
+            _grow_state()
+    return row
+
+
+def _grow_state():
+    """Double the state arrays; new rows start alive, with no energy or wander target."""
+    global _dead, _energy, _wander_x, _wander_z
+
+    _dead = np.concatenate((_dead, np.zeros_like(_dead)))
+    _energy = np.concatenate((_energy, np.full_like(_energy, np.nan)))
+    _wander_x = np.concatenate((_wander_x, np.full_like(_wander_x, np.nan)))
+    _wander_z = np.concatenate((_wander_z, np.full_like(_wander_z, np.nan)))
 
 
 # =========================
@@ -50,9 +92,17 @@ wander_targets = {}       # {agent_id: (target_x, target_z)}
 # =========================
 
 def decide_all(all_perceptions):
+    """
+    Same decisions as decide_all_columns, one response dict per agent:
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
     """
     Called by Unity once per decision cycle with ALL agents' perception data.
-    
+
     Args:
         all_perceptions: dict of {agent_id: perception_data}
             Each perception_data contains that agent's unique view of the world:
@@ -61,288 +111,272 @@ def decide_all(all_perceptions):
             - visible_agents: dict of agents THIS agent can see
             - heard_agents: dict of agents THIS agent can hear
             - health, infection status, etc.
-    
+
     Returns:
-        dict of {agent_id: decision}
-            Each decision contains movement and action for that specific agent
-    
+        The decisions as one list per field:
+        {"ids", "movement_type", "target_x", "target_z", "action_type", "target_id"}
+
     Note: Even though all data comes in one call, each agent's perception
     is still individualized - a predator at position (10,20) sees different
     agents than a prey at position (50,60).
     """
-    all_decisions = {}
-    
-    for agent_id, perception in all_perceptions.items():
-        try:
-            # Each agent gets its own decision based on its own perception
-            decision = decide_action(perception)
-            all_decisions[agent_id] = decision
-        except Exception as e:
-            # On error, return a safe "do nothing" decision
-            # This prevents one broken agent from crashing everyone
-            print(f"Error processing {agent_id}: {e}")
-            all_decisions[agent_id] = stop_response()
-    
-    return all_decisions
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        # On error, every agent stops
+        print(f"Error processing predator/prey batch: {e}")
+        return stop_columns(all_perceptions)
 
 
 # =========================
 # ===== AGENT LOGIC =======
 # =========================
 
-def decide_action(perception):
+def decide_batch(all_perceptions):
     """
-    Decision logic for a single agent. Called by decide_all() for each agent.
-    
-    This is where students write their behavior logic!
-    The perception dict contains everything this specific agent knows:
-    - Its own position, faction, health
-    - What it can see (based on its position and facing direction)
-    - What it can hear (based on its position)
-    
-    Args:
-        perception: dict with this agent's sensory data
-        
-    Returns:
-        dict with 'movement' and 'action' keys
+    Decide for all agents at once, one array element per agent.
+
+    - Prey flee from the closest visible predator, or wander
+    - Predators lose energy each decision and starve at 0; they kill the
+      closest visible prey when in capture range, chase it otherwise,
+      or wander when none is visible
+    - Dead agents (and unknown factions) stop
+
+    Returns the decisions as columns (see decide_all_columns).
     """
-    my_id = perception["my_id"]
-    my_x = perception["my_x"]
-    my_z = perception["my_z"]
-    my_faction = perception["my_faction"]
-    visible_agents = perception["visible_agents"]
-
-    # Dead agents do nothing
-    if my_id in dead_agents:
-        return stop_response()
-
-    # -------------------------
-    # PREY BEHAVIOR
-    # -------------------------
-    if my_faction == PREY_FACTION:
-        # Look for predators in what THIS prey can see
-        predator = find_closest_agent(
-            my_x, my_z, 
-            visible_agents, 
-            PREY_VISION_RADIUS, 
-            PREDATOR_FACTION
-        )
-        
-        if predator:
-            # Predator spotted! Run away!
-            flee_x, flee_z = flee_from(my_x, my_z, predator["x"], predator["z"])
-            return move_response(flee_x, flee_z, "run")
-        
-        # No threat - wander peacefully
-        target = get_wander_target(my_id, my_x, my_z)
-        return move_response(target[0], target[1], "walk")
-
-    # -------------------------
-    # PREDATOR BEHAVIOR
-    # -------------------------
-    if my_faction == PREDATOR_FACTION:
-        # Initialize energy for new predators
-        if my_id not in predator_energy:
-            predator_energy[my_id] = PREDATOR_INITIAL_ENERGY
-
-        # Lose energy over time (hunger)
-        predator_energy[my_id] -= ENERGY_DECAY_PER_DECISION
-        
-        # Starved to death
-        if predator_energy[my_id] <= 0:
-            dead_agents.add(my_id)
-            return stop_response()
-
-        # Hunt for prey in what THIS predator can see
-        prey = find_closest_agent(
-            my_x, my_z, 
-            visible_agents, 
-            PREDATOR_VISION_RADIUS, 
-            PREY_FACTION
-        )
-        
-        if prey:
-            dist = distance(my_x, my_z, prey["x"], prey["z"])
-            
-            if dist <= CAPTURE_DISTANCE:
-                # Close enough to kill!
-                predator_energy[my_id] += ENERGY_GAIN_ON_EAT
-                dead_agents.add(prey["agent_id"])  # Mark prey as dead
-                return kill_response(prey["agent_id"])
-            else:
-                # Chase the prey
-                return move_response(prey["x"], prey["z"], "run")
-
-        # No prey visible - wander and search
-        target = get_wander_target(my_id, my_x, my_z)
-        return move_response(target[0], target[1], "walk")
-
-    # Unknown faction - do nothing
-    return stop_response()
+    agent_ids = list(all_perceptions)
+    perceptions = list(all_perceptions.values())
+    n = len(perceptions)
+    if n == 0:
+        return {"ids": [], "movement_type": [], "target_x": [], "target_z": [], "action_type": [], "target_id": []}
+
+    my_ids = [p["my_id"] for p in perceptions]
+    my_x = np.fromiter((p["my_x"] for p in perceptions), dtype=np.float64, count=n)
+    my_z = np.fromiter((p["my_z"] for p in perceptions), dtype=np.float64, count=n)
+    faction = np.fromiter(
+        (FACTION_CODES.get(p["my_faction"], FACTION_OTHER) for p in perceptions), dtype=np.int8, count=n
+    )
+    is_prey = faction == FACTION_PREY
+    is_predator = faction == FACTION_PREDATOR
+    rows = np.fromiter(map(agent_row, my_ids), dtype=np.intp, count=n)
+    dead = _dead[rows]
+
+    # Default: stop, do nothing
+    movement = np.full(n, MOVE_STOP, dtype=np.int8)
+    action = np.full(n, ACT_NONE, dtype=np.int8)
+    out_x = np.zeros(n)
+    out_z = np.zeros(n)
+    target_ids = [""] * n
+
+    # === PREDATOR ENERGY: lose energy over time, starve at 0 ===
+    hunting = is_predator & ~dead
+    hunters = np.flatnonzero(hunting)
+    if len(hunters):
+        hunter_rows = rows[hunters]
+        energy = _energy[hunter_rows]
+        energy[np.isnan(energy)] = PREDATOR_INITIAL_ENERGY
+        energy -= ENERGY_DECAY_PER_DECISION
+        _energy[hunter_rows] = energy
+        starved = energy <= 0
+        _dead[hunter_rows[starved]] = True
+        hunting[hunters[starved]] = False
+
+    # === LOOK AROUND: closest predator for prey, closest prey for predators ===
+    alive_prey = is_prey & ~dead
+    seekers = np.flatnonzero(alive_prey | hunting)
+    seeker_is_prey = is_prey[seekers]
+    found, threat_x, threat_z, threat_d2, threat_ids = find_closest_agents(
+        my_x[seekers], my_z[seekers],
+        [perceptions[i]["visible_agents"] for i in seekers],
+        seeker_is_prey
+    )
+
+    # === PREY: predator spotted, run away! ===
+    fleeing = found & seeker_is_prey
+    if fleeing.any():
+        runners = seekers[fleeing]
+        out_x[runners], out_z[runners] = flee_from(my_x[runners], my_z[runners], threat_x[fleeing], threat_z[fleeing])
+        movement[runners] = MOVE_RUN
+
+    # === PREDATORS: chase the prey, or kill it when close enough ===
+    chasing = found & ~seeker_is_prey
+    if chasing.any():
+        hunters = seekers[chasing]
+        out_x[hunters] = threat_x[chasing]
+        out_z[hunters] = threat_z[chasing]
+        movement[hunters] = MOVE_RUN
+
+    # Kills are resolved in agent order: a prey can only be eaten once,
+    # and agents after the kill no longer see it
+    killed = {}  # {prey_id: index of the predator that caught it}
+    for k in np.flatnonzero(chasing):
+        i = seekers[k]
+        if killed and threat_ids[k] in killed:
+            # Target caught earlier this cycle: look again without it
+            again = find_closest_agents(
+                my_x[i:i + 1], my_z[i:i + 1], [perceptions[i]["visible_agents"]], seeker_is_prey[k:k + 1]
+            )
+            found[k] = again[0][0]
+            if not found[k]:
+                continue  # Nothing left in sight: wander (below)
+            threat_x[k], threat_z[k], threat_d2[k] = again[1][0], again[2][0], again[3][0]
+            threat_ids[k] = again[4][0]
+            out_x[i] = threat_x[k]
+            out_z[i] = threat_z[k]
+
+        if threat_d2[k] <= CAPTURE_DISTANCE_SQ:
+            # Close enough to kill!
+            prey_id = threat_ids[k]
+            _energy[rows[i]] += ENERGY_GAIN_ON_EAT
+            _dead[agent_row(prey_id)] = True  # Mark prey as dead
+            killed[prey_id] = i
+            movement[i] = MOVE_STOP
+            action[i] = ACT_KILL
+            out_x[i] = 0.0
+            out_z[i] = 0.0
+            target_ids[i] = prey_id
+
+    # Prey caught by a predator decided before them stop (they are dead)
+    caught = np.zeros(n, dtype=bool)
+    if killed:
+        for i, agent_id in enumerate(agent_ids):
+            if killed.get(agent_id, n) < i:
+                caught[i] = True
+                movement[i] = MOVE_STOP
+                out_x[i] = 0.0
+                out_z[i] = 0.0
+
+    # === NOTHING IN SIGHT: wander (caught prey stay stopped) ===
+    wanderers = seekers[~found & ~caught[seekers]]
+    if len(wanderers):
+        out_x[wanderers], out_z[wanderers] = get_wander_targets(rows[wanderers], my_x[wanderers], my_z[wanderers])
+        movement[wanderers] = MOVE_WALK
+
+    return {
+        "ids": agent_ids,
+        "movement_type": movement.tolist(),
+        "target_x": out_x.tolist(),
+        "target_z": out_z.tolist(),
+        "action_type": action.tolist(),
+        "target_id": target_ids
+    }
 
 
 # =========================
 # ===== HELPER FUNCTIONS ==
 # =========================
 
-def find_closest_agent(my_x, my_z, visible_agents, max_radius, target_faction):
+def find_closest_agents(my_x, my_z, visible, seeks_predator,
+                        _predator=PREDATOR_FACTION, _prey=PREY_FACTION):
     """
-    Find the closest agent of a specific faction within range.
-    
+    Find, for each agent, the closest visible agent of the faction it looks
+    for (predators if seeks_predator, prey otherwise) within its vision radius.
+
+    All candidates are flattened into one array and handed to the
+    closest_hits kernel; ties keep the first candidate in visible_agents order.
+    Factions are bound as defaults so the candidate scan reads locals;
+    dead candidates are masked out afterwards in one array lookup.
+
     Args:
-        my_x, my_z: this agent's position
-        visible_agents: dict of agents this agent can see
-        max_radius: maximum distance to consider
-        target_faction: faction to look for ("Predator" or "Prey")
-    
+        my_x, my_z: positions of the searching agents
+        visible: visible_agents dict of each searching agent
+        seeks_predator: bool array, True for prey (looking for predators)
+
     Returns:
-        dict with agent_id, x, z of closest matching agent, or None
+        (found, x, z, squared distance, agent_id) per searching agent
     """
-    closest = None
-    best_dist = max_radius
-    
-    for agent_id, agent_data in visible_agents.items():
-        # Skip dead agents
-        if agent_id in dead_agents:
-            continue
-        
-        # Skip wrong faction
-        if agent_data.get("faction") != target_faction:
-            continue
-        
-        # Check distance
-        d = distance(my_x, my_z, agent_data["x"], agent_data["z"])
-        if d < best_dist:
-            best_dist = d
-            closest = {
-                "agent_id": agent_id,
-                "x": agent_data["x"],
-                "z": agent_data["z"]
-            }
-    
-    return closest
+    m = len(visible)
+    found = np.zeros(m, dtype=bool)
+    best_x = np.zeros(m)
+    best_z = np.zeros(m)
+    best_d2 = np.full(m, np.inf)
+    best_ids = [""] * m
+
+    wanted = [_predator if s else _prey for s in seeks_predator.tolist()]
+    hits = [
+        (i, agent_id, agent_data["x"], agent_data["z"])
+        for i, (visible_agents, faction) in enumerate(zip(visible, wanted))
+        for agent_id, agent_data in visible_agents.items()
+        if agent_data.get("faction") == faction
+    ]
+    if not hits:
+        return found, best_x, best_z, best_d2, best_ids
+
+    owner, hit_ids, hit_x, hit_z = zip(*hits)
+    owner = np.array(owner, dtype=np.int64)
+    hit_x = np.array(hit_x, dtype=np.float64)
+    hit_z = np.array(hit_z, dtype=np.float64)
+
+    # Dead candidates are moved infinitely far away: never in range
+    hit_rows = np.fromiter(map(agent_row, hit_ids), dtype=np.intp, count=len(hit_ids))
+    hit_x[_dead[hit_rows]] = np.inf
+
+    # Squared distances, compared against the squared vision radius
+    radius_sq = np.where(seeks_predator, PREY_VISION_RADIUS_SQ, PREDATOR_VISION_RADIUS_SQ)
+    best, d2 = closest_hits(owner, hit_x, hit_z, my_x, my_z, radius_sq)
+
+    agents = np.flatnonzero(best >= 0)
+    first = best[agents]
+    found[agents] = True
+    best_x[agents] = hit_x[first]
+    best_z[agents] = hit_z[first]
+    best_d2[agents] = d2[agents]
+    for i, h in zip(agents.tolist(), first.tolist()):
+        best_ids[i] = hit_ids[h]
+
+    return found, best_x, best_z, best_d2, best_ids
 
 
 def flee_from(my_x, my_z, threat_x, threat_z):
     """
-    Calculate a position that flees away from a threat.
-    
+    Calculate positions that flee away from threats (arrays, one per agent).
+
     Returns:
-        (flee_x, flee_z) - position FLEE_DISTANCE units away from threat
+        (flee_x, flee_z) - positions FLEE_DISTANCE units away from threats
     """
     # Direction vector from threat to me
     dx = my_x - threat_x
     dz = my_z - threat_z
-    
-    # Normalize (avoid division by zero)
-    length = math.sqrt(dx * dx + dz * dz) or 0.01
-    dx /= length
-    dz /= length
-    
-    # Move FLEE_DISTANCE in that direction
-    return (my_x + dx * FLEE_DISTANCE, my_z + dz * FLEE_DISTANCE)
 
+    # Normalize (avoid division by zero: a threat exactly on top of me
+    # gives a zero direction either way), folded with FLEE_DISTANCE into
+    # one scale factor
+    d2 = dx * dx + dz * dz
+    scale = FLEE_DISTANCE / np.sqrt(np.where(d2 > 0.0, d2, 1.0))
 
-def get_wander_target(agent_id, current_x, current_z):
-    """
-    Get or generate a wander target for an agent.
-    Generates new target when agent reaches current one.
-    
-    Returns:
-        (target_x, target_z)
-    """
-    # Generate initial target if needed
-    if agent_id not in wander_targets:
-        wander_targets[agent_id] = generate_random_target(current_x, current_z)
-    
-    # Check if we've reached the target
-    tx, tz = wander_targets[agent_id]
-    if distance(current_x, current_z, tx, tz) < 1.0:
-        # Pick a new target
-        wander_targets[agent_id] = generate_random_target(current_x, current_z)
-    
-    return wander_targets[agent_id]
-
-
-def generate_random_target(x, z):
-    """
-    Generate a random point within WANDER_RADIUS of current position.
-    """
-    return (
-        x + random.uniform(-WANDER_RADIUS, WANDER_RADIUS),
-        z + random.uniform(-WANDER_RADIUS, WANDER_RADIUS)
-    )
+    # Move FLEE_DISTANCE in that direction
+    return (my_x + dx * scale, my_z + dz * scale)
 
 
-def distance(x1, z1, x2, z2):
+def get_wander_targets(rows, current_x, current_z):
     """
-    Euclidean distance between two points.
-    """
-    dx = x2 - x1
-    dz = z2 - z1
-    return math.sqrt(dx * dx + dz * dz)
-
+    Get or generate the wander targets of the given rows (arrays, one per agent).
+    Generates a new target when an agent reaches its current one.
 
-# =========================
-# ===== RESPONSE BUILDERS =
-# =========================
-
-def move_response(target_x, target_z, movement_type):
-    """
-    Build a response that moves the agent.
-    
-    Args:
-        target_x, target_z: destination coordinates
-        movement_type: "walk" or "run"
+    Returns:
+        (target_x, target_z)
     """
-    return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_x,
-            "target_z": target_z
-        },
-        "action": {
-            "type": "none",
-            "target_id": "",
-            "parameters": {}
-        }
-    }
+    # Generate initial targets if needed
+    new = np.isnan(_wander_x[rows])
+    if new.any():
+        _wander_x[rows[new]], _wander_z[rows[new]] = random_targets(current_x[new], current_z[new])
 
+    # Check if we've reached the target (within 1 unit, 1.0 squared)
+    dx = _wander_x[rows] - current_x
+    dz = _wander_z[rows] - current_z
+    reached = dx * dx + dz * dz < 1.0
+    if reached.any():
+        # Pick new targets
+        _wander_x[rows[reached]], _wander_z[rows[reached]] = random_targets(current_x[reached], current_z[reached])
 
-def stop_response():
-    """
-    Build a response that stops the agent (do nothing).
-    """
-    return {
-        "movement": {
-            "type": "stop",
-            "target_x": 0.0,
-            "target_z": 0.0
-        },
-        "action": {
-            "type": "none",
-            "target_id": "",
-            "parameters": {}
-        }
-    }
+    return _wander_x[rows], _wander_z[rows]
 
 
-def kill_response(target_id):
+def random_targets(x, z):
     """
-    Build a response that kills a target agent.
-    
-    Args:
-        target_id: the instance ID of the agent to kill
+    Generate a random point within WANDER_RADIUS of each position.
     """
-    return {
-        "movement": {
-            "type": "stop",
-            "target_x": 0.0,
-            "target_z": 0.0
-        },
-        "action": {
-            "type": "kill",
-            "target_id": target_id,
-            "parameters": {}
-        }
-    }
\ No newline at end of file
+    return (
+        x + _rng.uniform(-WANDER_RADIUS, WANDER_RADIUS, len(x)),
+        z + _rng.uniform(-WANDER_RADIUS, WANDER_RADIUS, len(z))
+    )
@@ -1,197 +1,207 @@
-import math
-import random
+import numpy as np
 import UnityEngine # type: ignore
 
+from _codes import MOVE_WALK, MOVE_STOP, MOVE_BREAK, ACT_NONE, ACT_PICK_UP, ACT_DROP_OFF
+from _codes import stop_columns, columns_to_responses
+from _core import pick_free_items
+
 # -----------------------------
 # Fonctions utilitaires
 # -----------------------------
 
-def near_item(robot_x, robot_z, items, threshold=1.0): 
-    for item in items:
-        if math.hypot(item['x'] - robot_x, item['z'] - robot_z) < threshold:
-            return True
-    return False
-
-def near_delivery(robot_x, robot_z, delivery_x, delivery_z, threshold=3): 
-    return math.hypot(delivery_x - robot_x, delivery_z - robot_z) < threshold
+def find_reserved_items(all_robots):
+    # Items visés par un robot
+    return {
+        str(robot_data.get('current_target_id'))
+        for robot_data in all_robots.values()
+        if str(robot_data.get('current_target_id', "0")) != "0"
+    }
 
 
 # -----------------------------
-# Fonction principale
+# Fonction principale (tous les robots d'un coup)
 # -----------------------------
 
-def decide_action(perception):
-    # -----------------------------
-    # RÉCUPÉRATION DES DONNÉES
-    # -----------------------------
-    robot_id = str(perception.get('my_id', ''))
-    robot_x = float(perception.get('my_x', 0.0))
-    robot_z = float(perception.get('my_z', 0.0))
-
-    spawn_x = float(perception.get('spawn_x', 0.0))
-    spawn_z = float(perception.get('spawn_z', 0.0))
-
-    carrying_item = perception.get('is_carrying', 0) == 1
-
-    visible_items = perception.get('items', [])
-    visible_items_by_id = {str(item['id']): item for item in visible_items}
-
-    delivery_zones = perception.get('deposites', [])
-    all_robots = perception.get('all_agents', {})
-    obstacles = perception.get('obstacles', [])
-
-    current_target_id = str(perception.get('current_target_id'))
-
-    target_id = "0"
-    target_pos_x = spawn_x
-    target_pos_z = spawn_z
+def decide_batch(all_perceptions):
+    """
+    Décide pour tous les robots à la fois : une case de tableau NumPy par
+    robot. Items, dépôts, obstacles et all_agents sont identiques pour tous
+    les robots : lus une seule fois. Les seuils de distance sont comparés
+    au carré.
+    Retourne les décisions en colonnes (voir decide_all_columns).
+    """
+    agent_ids = list(all_perceptions)
+    perceptions = list(all_perceptions.values())
+    n = len(perceptions)
+    if n == 0:
+        return {"ids": [], "movement_type": [], "target_x": [], "target_z": [], "action_type": [], "target_id": []}
 
     # -----------------------------
-    # ITEMS RÉSERVÉS
+    # RÉCUPÉRATION DES DONNÉES
     # -----------------------------
-    reserved_items = {
-        str(robot_data.get('current_target_id'))
-        for other_robot_id, robot_data in all_robots.items()
-        if str(other_robot_id) != robot_id
-        and str(robot_data.get('current_target_id', "0")) != "0"
-    }
+    robot_ids = [str(p.get('my_id', '')) for p in perceptions]
+    robot_x = np.fromiter((float(p.get('my_x', 0.0)) for p in perceptions), dtype=np.float64, count=n)
+    robot_z = np.fromiter((float(p.get('my_z', 0.0)) for p in perceptions), dtype=np.float64, count=n)
+    spawn_x = np.fromiter((float(p.get('spawn_x', 0.0)) for p in perceptions), dtype=np.float64, count=n)
+    spawn_z = np.fromiter((float(p.get('spawn_z', 0.0)) for p in perceptions), dtype=np.float64, count=n)
+    carrying = np.fromiter((p.get('is_carrying', 0) == 1 for p in perceptions), dtype=bool, count=n)
+    current_target_ids = [str(p.get('current_target_id')) for p in perceptions]
+
+    # Données partagées (mêmes listes pour tous les robots)
+    shared = perceptions[0]
+    visible_items_by_id = {str(item['id']): item for item in shared.get('items', [])}
+    item_ids = list(visible_items_by_id)
+    item_x = np.array([item['x'] for item in visible_items_by_id.values()], dtype=np.float64)
+    item_z = np.array([item['z'] for item in visible_items_by_id.values()], dtype=np.float64)
+    item_index = {item_id: j for j, item_id in enumerate(item_ids)}
+
+    delivery_zones = shared.get('deposites', [])
+    delivery_x = np.array([d['x'] for d in delivery_zones], dtype=np.float64)
+    delivery_z = np.array([d['z'] for d in delivery_zones], dtype=np.float64)
+
+    obstacles = shared.get('obstacles', [])
+    obstacle_x = np.array([o['x'] for o in obstacles], dtype=np.float64)
+    obstacle_z = np.array([o['z'] for o in obstacles], dtype=np.float64)
+
+    all_robots = shared.get('all_agents', {})
+    other_ids = [str(other_id) for other_id in all_robots]
+    other_x = np.array([data.get('x', 0.0) for data in all_robots.values()], dtype=np.float64)
+    other_z = np.array([data.get('z', 0.0) for data in all_robots.values()], dtype=np.float64)
+    other_idle = np.array([
+        not data.get('is_carrying') and data.get('current_target_id') == "0"
+        for data in all_robots.values()
+    ], dtype=bool)
+
+    target_ids = ["0"] * n
+    target_x = spawn_x.copy()
+    target_z = spawn_z.copy()
+
+    # Cible courante disparue (ramassée par un autre) : le robot s'arrête
+    # et libère sa cible, comme le repli d'erreur de decide_all_columns
+    lost = np.zeros(n, dtype=bool)
 
     # =============================
     # MODE : TRANSPORTE → DÉPÔT
     # =============================
-    if carrying_item and delivery_zones:
-        closest_delivery = min(
-            delivery_zones,
-            key=lambda d: (d['x'] - robot_x) ** 2 + (d['z'] - robot_z) ** 2
-        )
-        target_pos_x = closest_delivery['x']
-        target_pos_z = closest_delivery['z']
+    delivering = np.flatnonzero(carrying) if len(delivery_zones) else np.empty(0, dtype=np.intp)
+    if len(delivering):
+        d2 = (delivery_x[None, :] - robot_x[delivering, None]) ** 2 + (delivery_z[None, :] - robot_z[delivering, None]) ** 2
+        closest = d2.argmin(axis=1)
+        target_x[delivering] = delivery_x[closest]
+        target_z[delivering] = delivery_z[closest]
 
     # =============================
     # MODE : CHERCHE UN ITEM
     # =============================
-    elif not carrying_item:
+    searching = []
+    for i in np.flatnonzero(~carrying).tolist():
+        current_target_id = current_target_ids[i]
+        if current_target_id == "0":
+            searching.append(i)
+            continue
         # Si la cible courante est visible
-        if current_target_id != "0":
-            item = visible_items_by_id[current_target_id]
-            target_id = current_target_id
-            target_pos_x = item['x']
-            target_pos_z = item['z']
-        else:
-            # Robots sans cible
-            available_other_robots_without_target = {
-                other_robot_id: other_robot_data
-                for other_robot_id, other_robot_data in all_robots.items()
-                if other_robot_id != robot_id
-                and not other_robot_data.get('is_carrying') 
-                and other_robot_data.get('current_target_id') == "0"
-            }
-
-            # Items libres
-            available_items = [
-                item for item_id, item in visible_items_by_id.items()
-                if item_id not in reserved_items
-            ]
-
-            # Tri par distance
-            available_items.sort(
-                key=lambda item: (item['x'] - robot_x) ** 2 + (item['z'] - robot_z) ** 2
-            )
-            
-            # Sélection polie
-            for item in available_items:
-                my_distance_sq = (float(item['x']) - robot_x) ** 2 + (float(item['z']) - robot_z) ** 2
-                closer = True
-
-                for other_robot_id, other_robot in available_other_robots_without_target.items():
-
-                    other_x = float(other_robot.get('x'))
-                    other_z = float(other_robot.get('z'))
-
-                    item_x = float(item['x'])
-                    item_z = float(item['z'])
-
-                    dx = item_x - other_x
-                    dz = item_z - other_z
-                    other_distance_sq = dx * dx + dz * dz
-
-                    is_other_closer = other_distance_sq < my_distance_sq
-
-                    is_same_distance = math.isclose(
-                        other_distance_sq,
-                        my_distance_sq,
-                        rel_tol=0.01
-                    )
-
-                    other_has_priority = str(other_robot_id) < robot_id
-
-                    other_robot_wins = is_other_closer or (is_same_distance and other_has_priority)
-
-                    if other_robot_wins:
-                        closer = False
-                        break
-
-                if closer :
-                    target_id = str(item['id'])
-                    target_pos_x = item['x']
-                    target_pos_z = item['z']
-                    break      
+        j = item_index.get(current_target_id)
+        if j is None:
+            lost[i] = True
+            continue
+        target_ids[i] = current_target_id
+        target_x[i] = item_x[j]
+        target_z[i] = item_z[j]
+
+    # Items libres : réservés par aucun robot. Un robot qui cherche n'a
+    # pas de cible lui-même, il ne réserve donc rien qu'on doive exclure
+    reserved_items = find_reserved_items(all_robots)
+    free = np.flatnonzero([item_id not in reserved_items for item_id in item_ids])
+
+    if searching and len(free):
+        searching = np.array(searching, dtype=np.intp)
+
+        # Robots sans cible : concurrents pour les items libres
+        idle = np.flatnonzero(other_idle)
+
+        # Rang de chaque identifiant dans l'ordre des chaînes, pour départager
+        # les égalités (le plus petit identifiant gagne)
+        searching_ids = [robot_ids[i] for i in searching.tolist()]
+        idle_ids = [other_ids[k] for k in idle.tolist()]
+        rank = {robot_id: r for r, robot_id in enumerate(sorted(set(searching_ids).union(idle_ids)))}
+
+        # Sélection polie : le plus proche des items qu'aucun concurrent ne
+        # gagne (plus proche, ou à 1 % près avec un plus petit identifiant)
+        best = pick_free_items(
+            robot_x[searching], robot_z[searching],
+            np.array([rank[robot_id] for robot_id in searching_ids], dtype=np.int64),
+            item_x[free], item_z[free],
+            other_x[idle], other_z[idle],
+            np.array([rank[robot_id] for robot_id in idle_ids], dtype=np.int64)
+        )
+        chosen = best >= 0
+        for i, j in zip(searching[chosen].tolist(), free[best[chosen]].tolist()):
+            target_ids[i] = item_ids[j]
+            target_x[i] = item_x[j]
+            target_z[i] = item_z[j]
 
     # =============================
     # ACTIONS
     # =============================
-    distance_to_target = math.hypot(target_pos_x - robot_x, target_pos_z - robot_z)
-    movement_type = "walk"
-    action_type = "none"
+    distance_to_target_sq = (target_x - robot_x) ** 2 + (target_z - robot_z) ** 2
+    movement_type = np.full(n, MOVE_WALK, dtype=np.int8)
+    action_type = np.full(n, ACT_NONE, dtype=np.int8)
 
-    if not carrying_item and target_id != "0" and near_item(robot_x, robot_z, visible_items):
-        action_type = "pick_up"
-        movement_type = "stop"
+    has_target = np.array([target_id != "0" for target_id in target_ids], dtype=bool)
+    near_item = ((item_x[None, :] - robot_x[:, None]) ** 2 + (item_z[None, :] - robot_z[:, None]) ** 2 < 1.0).any(axis=1)
+    picking_up = ~carrying & has_target & near_item
+    action_type[picking_up] = ACT_PICK_UP
+    movement_type[picking_up] = MOVE_STOP
 
-    if carrying_item and distance_to_target < 0.6:
-        action_type = "drop_off"
-        movement_type = "stop"
+    dropping_off = carrying & (distance_to_target_sq < 0.6 * 0.6)
+    action_type[dropping_off] = ACT_DROP_OFF
+    movement_type[dropping_off] = MOVE_STOP
 
     # =============================
     # ÉVITEMENT OBSTACLES
     # =============================
-    avoidance_x, avoidance_z = 0.0, 0.0
-
-    for obstacle in obstacles:
-        dx = robot_x - obstacle['x']
-        dz = robot_z - obstacle['z']
-        distance = math.hypot(dx, dz)
-        if 0 < distance < 2.5:
-            strength = (3 - distance) / 2
-            avoidance_x += (dx / distance) * strength * 2
-            avoidance_z += (dz / distance) * strength * 2
-            movement_type = "break"
+    dx = robot_x[:, None] - obstacle_x[None, :]
+    dz = robot_z[:, None] - obstacle_z[None, :]
+    distance_sq = dx * dx + dz * dz
+    close = (0 < distance_sq) & (distance_sq < 2.5 * 2.5)
+    distance = np.sqrt(np.where(close, distance_sq, 1.0))
+    # (dx / distance) * strength * 2, avec strength = (3 - distance) / 2
+    scale = np.where(close, (3 - distance) / distance, 0.0)
+    avoidance_x = (dx * scale).sum(axis=1)
+    avoidance_z = (dz * scale).sum(axis=1)
+    braking = close.any(axis=1)
 
     # =============================
     # ÉVITEMENT AGENTS
     # =============================
-    for other_id, other_data in all_robots.items():
-        if str(other_id) == robot_id:
-            continue
-        dx = robot_x - other_data.get('x', 0.0)
-        dz = robot_z - other_data.get('z', 0.0)
-        distance = math.hypot(dx, dz)
-        if 0 < distance < 1:
-            strength = (1 - distance)
-            avoidance_x += (dx / distance) * strength * 1
-            avoidance_z += (dz / distance) * strength * 1
-            movement_type = "break"
+    dx = robot_x[:, None] - other_x[None, :]
+    dz = robot_z[:, None] - other_z[None, :]
+    distance_sq = dx * dx + dz * dz
+    close = (0 < distance_sq) & (distance_sq < 1) & (np.array(other_ids, dtype=str)[None, :] != np.array(robot_ids, dtype=str)[:, None])
+    distance = np.sqrt(np.where(close, distance_sq, 1.0))
+    # (dx / distance) * strength, avec strength = 1 - distance
+    scale = np.where(close, (1 - distance) / distance, 0.0)
+    avoidance_x += (dx * scale).sum(axis=1)
+    avoidance_z += (dz * scale).sum(axis=1)
+    braking |= close.any(axis=1)
+
+    movement_type[braking] = MOVE_BREAK
+    target_x += avoidance_x
+    target_z += avoidance_z
+
+    # Cible perdue : arrêt sur place, sans action
+    movement_type[lost] = MOVE_STOP
+    action_type[lost] = ACT_NONE
+    target_x[lost] = 0.0
+    target_z[lost] = 0.0
 
     return {
-        "movement": {
-            "type": movement_type,
-            "target_x": target_pos_x + avoidance_x,
-            "target_z": target_pos_z + avoidance_z
-        },
-        "action": {
-            "type": action_type,
-            "target_id": target_id
-        }
+        "ids": agent_ids,
+        "movement_type": movement_type.tolist(),
+        "target_x": target_x.tolist(),
+        "target_z": target_z.tolist(),
+        "action_type": action_type.tolist(),
+        "target_id": target_ids
     }
 
 
@@ -199,16 +209,23 @@ def decide_action(perception):
 # ===== BATCH WRAPPER ===== 
 # ========================= 
 
-def decide_all(all_perceptions): 
-    all_decisions = {} 
-    for agent_id, perception in all_perceptions.items(): 
-        try: 
-            decision = decide_action(perception) 
-            all_decisions[agent_id] = decision 
-        except Exception as e: 
-            UnityEngine.Debug.LogError(f"Error processing {agent_id}: {e}") 
-            all_decisions[agent_id] = {
-                "movement": {"type": "stop", "target_x": 0.0, "target_z": 0.0},
-                "action": {"type": "none", "target_id": "0"}
-            }
-    return all_decisions
+def decide_all(all_perceptions):
+    """
+    Mêmes décisions que decide_all_columns, une réponse par robot :
+    {agent_id: {"movement": {...}, "action": {...}}}.
+    """
+    return columns_to_responses(decide_all_columns(all_perceptions))
+
+
+def decide_all_columns(all_perceptions):
+    """
+    Point d'entrée appelé par Unity.
+    Renvoie les décisions en colonnes (une liste par champ) :
+    {"ids", "movement_type", "target_x", "target_z", "action_type", "target_id"}.
+    En cas d'erreur, tous les robots s'arrêtent et libèrent leur cible ("0").
+    """
+    try:
+        return decide_batch(all_perceptions)
+    except Exception as e:
+        UnityEngine.Debug.LogError(f"Error processing robot batch: {e}")
+        return stop_columns(all_perceptions, "0")
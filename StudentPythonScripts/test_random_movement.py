@@ -1,7 +1,6 @@
 ﻿import numpy as np
 from mlagents_envs.environment import UnityEnvironment
 from mlagents_envs.base_env import ActionTuple
-import time
 
 def main():
     print("Connecting to Unity...")
@@ -17,6 +16,8 @@ def main():
     print("Sending random movement commands...\n")
     
     step_count = 0
+    rng = np.random.default_rng()
+    actions = None
     
     try:
         while True:
@@ -26,13 +27,12 @@ def main():
             if len(decision_steps) > 0:
                 n_agents = len(decision_steps)
                 
-                # Create random actions for each agent
-                actions = np.zeros((n_agents, 3))
-                
-                for i in range(n_agents):
-                    actions[i, 0] = np.random.uniform(-20, 20)  # Random X
-                    actions[i, 1] = np.random.uniform(-20, 20)  # Random Z
-                    actions[i, 2] = np.random.choice([0, 1])    # Random walk/run
+                # Create random actions for all agents at once
+                # (buffer reused while the agent count stays the same)
+                if actions is None or actions.shape[0] != n_agents:
+                    actions = np.empty((n_agents, 3), dtype=np.float32)
+                actions[:, 0:2] = rng.uniform(-20, 20, size=(n_agents, 2))  # Random X, Z
+                actions[:, 2] = rng.integers(0, 2, size=n_agents)           # Random walk/run
                 
                 # Send to Unity
                 action_tuple = ActionTuple(continuous=actions)
@@ -44,8 +44,7 @@ def main():
                 
                 step_count += 1
             
-            env.step()
-            time.sleep(0.02)  # Small delay
+            env.step()  # Blocks until Unity requests the next decisions
             
     except KeyboardInterrupt:
         print("\n\nStopping...")
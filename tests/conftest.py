@@ -0,0 +1,27 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+import _core  # noqa: E402
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def backend(request, monkeypatch):
+    """
+    Reload _core with the Numba kernels or the NumPy fallback.
+    Behaviors import the kernels by name: reload them after this fixture.
+    """
+    if request.param == "numba":
+        pytest.importorskip("numba")
+    else:
+        # A None entry makes `from numba import njit` raise ImportError
+        monkeypatch.setitem(sys.modules, "numba", None)
+    core = importlib.reload(_core)
+    assert core.NUMBA_AVAILABLE == (request.param == "numba")
+    yield core
+    monkeypatch.undo()
+    importlib.reload(_core)
@@ -0,0 +1,68 @@
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+import flock  # noqa: E402
+from _codes import MOVE_WALK  # noqa: E402
+
+
+def batch(positions):
+    all_agents = {agent_id: {"x": x, "z": z} for agent_id, (x, z) in positions.items()}
+    return {
+        agent_id: {"my_id": agent_id, "my_x": x, "my_z": z, "all_agents": all_agents}
+        for agent_id, (x, z) in positions.items()
+    }
+
+
+def test_leader_does_not_follow_a_merge_chain_out_of_range():
+    fl = importlib.reload(flock)
+    # a1 merges into a0 (lower id) first; a2 picked a1, but a0 is 6 units away
+    decisions = fl.decide_all(batch({"a0": (0.0, 0.0), "a1": (3.0, 0.0), "a2": (6.0, 0.0)}))
+
+    assert fl.group_memberships == {"a1": "a0"}
+    assert set(fl.leader_data) == {"a0", "a2"}
+    wander = fl.leader_data["a2"]
+    assert (decisions["a2"]["movement"]["target_x"], decisions["a2"]["movement"]["target_z"]) == \
+        (wander.target_x, wander.target_z)
+    assert (decisions["a1"]["movement"]["target_x"], decisions["a1"]["movement"]["target_z"]) == (0.0, 0.0)
+
+
+
+def test_equal_groups_merge_into_the_lower_id_and_follow_it(backend):
+    fl = importlib.reload(flock)
+    decisions = fl.decide_all(batch({"a0": (0.0, 0.0), "a1": (2.0, 0.0)}))
+
+    assert fl.group_memberships == {"a1": "a0"}
+    assert fl.leader_data["a0"].group_size == 2
+    assert decisions["a1"]["movement"]["type"] == MOVE_WALK
+    assert (decisions["a1"]["movement"]["target_x"], decisions["a1"]["movement"]["target_z"]) == (0.0, 0.0)
+
+    # Next cycle the follower heads wherever its leader went
+    decisions = fl.decide_all(batch({"a0": (5.0, 5.0), "a1": (2.0, 0.0)}))
+    assert (decisions["a1"]["movement"]["target_x"], decisions["a1"]["movement"]["target_z"]) == (5.0, 5.0)
+
+
+def test_larger_group_wins_over_a_lower_id(backend):
+    fl = importlib.reload(flock)
+    fl.decide_all(batch({"b0": (100.0, 100.0), "b1": (101.0, 100.0)}))
+
+    decisions = fl.decide_all(batch({"a0": (102.0, 100.0), "b0": (100.0, 100.0), "b1": (101.0, 100.0)}))
+
+    assert fl.group_memberships == {"a0": "b0", "b1": "b0"}
+    assert fl.leader_data["b0"].group_size == 3
+    assert (decisions["a0"]["movement"]["target_x"], decisions["a0"]["movement"]["target_z"]) == (100.0, 100.0)
+
+
+def test_follower_of_a_vanished_leader_leads_again(backend):
+    fl = importlib.reload(flock)
+    fl.decide_all(batch({"a0": (0.0, 0.0), "a1": (2.0, 0.0)}))
+
+    decisions = fl.decide_all(batch({"a1": (2.0, 0.0)}))
+
+    assert fl.group_memberships == {}
+    assert "a1" in fl.leader_data
+    wander = fl.leader_data["a1"]
+    assert (decisions["a1"]["movement"]["target_x"], decisions["a1"]["movement"]["target_z"]) == \
+        (wander.target_x, wander.target_z)
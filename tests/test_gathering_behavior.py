@@ -0,0 +1,79 @@
+import importlib
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+import gathering_behavior  # noqa: E402
+from _codes import MOVE_RUN, MOVE_STOP, ACT_NONE  # noqa: E402
+
+
+def perception(agent_id, x, z, visible_agents=None, stage=0):
+    return {
+        "my_id": agent_id,
+        "my_x": x,
+        "my_z": z,
+        "health": 100.0,
+        "is_contagious": 0,
+        "infection_stage": stage,
+        "heard_count": 0,
+        "visible_count": len(visible_agents or {}),
+        "visible_agents": visible_agents or {},
+    }
+
+
+def load(seed):
+    gb = importlib.reload(gathering_behavior)
+    gb._rng = np.random.default_rng(seed)
+    return gb
+
+
+def decide(gb, *perceptions):
+    columns = gb.decide_batch({p["my_id"]: p for p in perceptions})
+    return dict(zip(columns["ids"], zip(
+        columns["movement_type"], columns["target_x"], columns["target_z"], columns["action_type"])))
+
+
+def test_healthy_agent_runs_away_from_a_sneezing_neighbour(backend, monkeypatch):
+    gb = load(0)
+    monkeypatch.setattr(gb, "FLEE_CHANCE", 1.0)
+    sneezer = {"s": {"x": 3.0, "z": 0.0, "distance": 3.0, "current_action": "sneeze"}}
+
+    decisions = decide(gb, perception("h", 0.0, 0.0, sneezer), perception("i", 0.0, 0.0, sneezer, stage=1))
+
+    movement, target_x, target_z, action = decisions["h"]
+    assert (movement, action) == (MOVE_RUN, ACT_NONE)
+    assert math.isclose(target_x, -10.0) and math.isclose(target_z, 0.0, abs_tol=1e-12)
+    # Already infected: no avoidance, heads to a POI instead
+    slot = gb._state_idx["i"]
+    assert gb._current_poi[slot] >= 0 and gb._is_traveling[slot]
+
+
+def test_agent_travels_waits_then_picks_another_poi(backend):
+    gb = load(1)
+
+    movement, x, z, _ = decide(gb, perception("a", 0.0, 0.0))["a"]
+    slot = gb._state_idx["a"]
+    first_poi = int(gb._current_poi[slot])
+    assert movement == MOVE_RUN
+    assert math.hypot(x - gb.POI_X[first_poi], z - gb.POI_Z[first_poi]) <= gb.POI_SPREAD_RADIUS + 1e-5
+
+    # Arrived: stop where we stand until the stay is over
+    cycles = 0
+    while True:
+        movement, tx, tz, _ = decide(gb, perception("a", x, z))["a"]
+        if movement != MOVE_STOP:
+            break
+        assert (tx, tz) == (x, z)
+        assert gb._current_poi[slot] == first_poi and not gb._is_traveling[slot]
+        cycles += 1
+    assert gb.STAY_DURATION_MIN <= cycles * gb.DECISION_INTERVAL <= gb.STAY_DURATION_MAX + gb.DECISION_INTERVAL
+
+    # Stay over: run to a different POI
+    new_poi = int(gb._current_poi[slot])
+    assert movement == MOVE_RUN and gb._is_traveling[slot]
+    assert new_poi != first_poi
+    assert math.hypot(tx - gb.POI_X[new_poi], tz - gb.POI_Z[new_poi]) <= gb.POI_SPREAD_RADIUS + 1e-5
@@ -0,0 +1,93 @@
+import importlib
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+import hunger_behavior  # noqa: E402
+from _codes import MOVE_WALK, MOVE_RUN, MOVE_STOP, ACT_NONE, ACT_EAT  # noqa: E402
+
+
+def perception(agent_id, x, z, hunger, visible_food=None, state="Alive"):
+    return {
+        "my_id": agent_id,
+        "my_x": x,
+        "my_z": z,
+        "hunger": hunger,
+        "my_state": state,
+        "visible_food": visible_food or {},
+    }
+
+
+def load(seed):
+    hb = importlib.reload(hunger_behavior)
+    hb._rng = np.random.default_rng(seed)
+    return hb
+
+
+def decide(hb, *perceptions):
+    columns = hb.decide_batch({p["my_id"]: p for p in perceptions})
+    return dict(zip(columns["ids"], zip(
+        columns["movement_type"], columns["target_x"], columns["target_z"],
+        columns["action_type"], columns["target_id"])))
+
+
+def test_hungry_agent_runs_to_the_closest_plate(backend):
+    hb = load(0)
+    food = {
+        "far": {"x": 10.0, "z": 0.0},
+        "near": {"x": 0.0, "z": -3.0},
+        "tie": {"x": 3.0, "z": 0.0},
+    }
+
+    decisions = decide(hb, perception("a", 0.0, 0.0, 10.0, food), perception("d", 0.0, 0.0, 10.0, food, "Dead"))
+
+    # Ties keep the first plate in visible_food order
+    assert decisions["a"] == (MOVE_RUN, 0.0, -3.0, ACT_EAT, "near")
+    assert decisions["d"] == (MOVE_STOP, 0.0, 0.0, ACT_NONE, "")
+
+
+def test_hungry_agent_without_food_looks_in_four_directions(backend):
+    hb = load(1)
+
+    targets = [decide(hb, perception("a", 1.0, 2.0, 10.0))["a"] for _ in range(hb.SEARCH_DIRECTIONS)]
+
+    assert all(movement == MOVE_WALK and action == ACT_NONE for movement, _, _, action, _ in targets)
+    angles = []
+    for _, x, z, _, _ in targets:
+        assert math.isclose(math.hypot(x - 1.0, z - 2.0), hb.SEARCH_STEP_DISTANCE)
+        angles.append(math.atan2(z - 2.0, x - 1.0))
+    # Each step turns a further 90°
+    for previous, current in zip(angles, angles[1:]):
+        assert math.isclose((current - previous) % (2 * math.pi), hb.ANGLE_PER_STEP)
+    # Pattern done: a new one starts around the current position
+    row = hb.agent_rows["a"]
+    assert hb._search_step[row] == 0
+
+    # Food in sight ends the search
+    decide(hb, perception("a", 1.0, 2.0, 10.0, {"f": {"x": 0.0, "z": 0.0}}))
+    assert not hb._searching[row]
+
+
+def test_fed_agent_wanders_around_its_position(backend):
+    hb = load(2)
+
+    decisions = [decide(hb, perception("a", 5.0, -5.0, 80.0))["a"] for _ in range(50)]
+
+    row = hb.agent_rows["a"]
+    assert hb._wandering[row] and not hb._searching[row]
+    movements = {movement for movement, _, _, _, _ in decisions}
+    assert movements == {MOVE_WALK, MOVE_RUN, MOVE_STOP}
+    for movement, x, z, action, _ in decisions:
+        assert action == ACT_NONE
+        if movement == MOVE_STOP:
+            assert (x, z) == (5.0, -5.0)
+        else:
+            assert abs(x - 5.0) <= hb.WANDER_RADIUS and abs(z + 5.0) <= hb.WANDER_RADIUS
+
+    # Getting hungry drops the wander state
+    decide(hb, perception("a", 5.0, -5.0, 10.0))
+    assert not hb._wandering[row]
@@ -0,0 +1,53 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+import predator_prey  # noqa: E402
+from _codes import MOVE_STOP, ACT_KILL, ACT_NONE  # noqa: E402
+
+
+def perception(agent_id, faction, x, z, visible_agents):
+    return {
+        "my_id": agent_id,
+        "my_faction": faction,
+        "my_x": x,
+        "my_z": z,
+        "visible_agents": visible_agents,
+    }
+
+
+def test_prey_killed_earlier_in_cycle_stops_even_if_it_sees_nothing():
+    pp = importlib.reload(predator_prey)
+    batch = {
+        "P": perception("P", pp.PREDATOR_FACTION, 0.0, 0.0,
+                        {"Q": {"x": 1.0, "z": 0.0, "faction": pp.PREY_FACTION}}),
+        # Q's vision cone does not include P
+        "Q": perception("Q", pp.PREY_FACTION, 1.0, 0.0, {}),
+    }
+
+    columns = pp.decide_batch(batch)
+    decisions = dict(zip(columns["ids"], zip(
+        columns["movement_type"], columns["target_x"], columns["target_z"],
+        columns["action_type"], columns["target_id"])))
+
+    assert decisions["P"][0] == MOVE_STOP
+    assert decisions["P"][3] == ACT_KILL
+    assert decisions["P"][4] == "Q"
+    assert decisions["Q"] == (MOVE_STOP, 0.0, 0.0, ACT_NONE, "")
+    # No wander target was drawn for the dead prey
+    assert all(v != v for v in (pp._wander_x[pp.agent_rows["Q"]], pp._wander_z[pp.agent_rows["Q"]]))
+
+
+def test_flee_from_normalises_exactly_for_very_close_threats():
+    pp = importlib.reload(predator_prey)
+    my_x = np.array([0.005, 3.0, 2.0])
+    my_z = np.array([0.0, 4.0, 2.0])
+    # Threats 0.005 and 5 units away, and one exactly on top of the agent
+    flee_x, flee_z = pp.flee_from(my_x, my_z, np.array([0.0, 0.0, 2.0]), np.array([0.0, 0.0, 2.0]))
+
+    assert np.allclose(flee_x, [0.005 + pp.FLEE_DISTANCE, 3.0 + 0.6 * pp.FLEE_DISTANCE, 2.0])
+    assert np.allclose(flee_z, [0.0, 4.0 + 0.8 * pp.FLEE_DISTANCE, 2.0])
@@ -0,0 +1,64 @@
+import importlib
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Assets", "Scripts", "Student"))
+
+# robot.py logs through Unity; outside Unity a stand-in module is enough
+_unity = types.ModuleType("UnityEngine")
+_unity.Debug = types.SimpleNamespace(LogError=print, Log=print)
+sys.modules.setdefault("UnityEngine", _unity)
+
+import robot  # noqa: E402
+from _codes import MOVE_WALK, MOVE_STOP, ACT_NONE  # noqa: E402
+
+
+def batch(robots, items):
+    """robots: {id: (x, z, current_target_id)}, items: {id: (x, z)}."""
+    all_agents = {
+        robot_id: {"x": x, "z": z, "is_carrying": 0, "current_target_id": target_id}
+        for robot_id, (x, z, target_id) in robots.items()
+    }
+    shared = {
+        "items": [{"id": item_id, "x": x, "z": z} for item_id, (x, z) in items.items()],
+        "deposites": [{"id": "d", "x": 0.0, "z": -20.0}],
+        "obstacles": [],
+        "all_agents": all_agents,
+    }
+    return {
+        robot_id: dict(shared, my_id=robot_id, my_x=x, my_z=z, spawn_x=x, spawn_z=z,
+                       is_carrying=0, current_target_id=target_id)
+        for robot_id, (x, z, target_id) in robots.items()
+    }
+
+
+def decide(perceptions):
+    columns = robot.decide_batch(perceptions)
+    return dict(zip(columns["ids"], zip(
+        columns["movement_type"], columns["target_x"], columns["target_z"],
+        columns["action_type"], columns["target_id"])))
+
+
+def test_idle_robots_leave_a_tied_item_to_the_lower_id(backend):
+    importlib.reload(robot)
+    # i1 is 1.5 away from both robots: r1 wins it, r2 takes the next free item
+    decisions = decide(batch(
+        {"r2": (3.0, 0.0, "0"), "r1": (0.0, 0.0, "0")},
+        {"i1": (1.5, 0.0), "i2": (10.0, 0.0)},
+    ))
+
+    assert decisions["r1"] == (MOVE_WALK, 1.5, 0.0, ACT_NONE, "i1")
+    assert decisions["r2"] == (MOVE_WALK, 10.0, 0.0, ACT_NONE, "i2")
+
+
+def test_robot_whose_target_was_taken_stops_and_releases_it(backend):
+    importlib.reload(robot)
+    decisions = decide(batch(
+        {"r1": (0.0, 0.0, "gone"), "r2": (5.0, 0.0, "i1")},
+        {"i1": (6.0, 0.0)},
+    ))
+
+    assert decisions["r1"] == (MOVE_STOP, 0.0, 0.0, ACT_NONE, "0")
+    # A robot keeps a target that is still listed
+    assert decisions["r2"] == (MOVE_WALK, 6.0, 0.0, ACT_NONE, "i1")